@@ -1,20 +1,204 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
 import cv2
-from pyzbar import pyzbar
+import numpy as np
+
+# Prefer zxing-cpp (native decoder, faster than pyzbar) and fall back to pyzbar
+try:
+    import zxingcpp
+    ZXING_AVAILABLE = True
+except ImportError:
+    from pyzbar import pyzbar
+    ZXING_AVAILABLE = False
+    print("WARNING: zxing-cpp not available - falling back to pyzbar")
+
+DECODE_EVERY = 3          # decode one frame out of every N captured
+MOTION_THRESHOLD = 2.0    # mean abs gray diff below this counts as the same scene
+REPEAT_SUPPRESS_S = 1.0   # don't print the same barcode twice within this window
+MAX_DECODE_WIDTH = 640    # ROIs wider than this are downscaled before decoding
+MIN_REGION_AREA = 2000    # smallest candidate barcode region (px) worth decoding
+REGION_PAD = 10           # padding added around each candidate region
+
+# No X display (e.g. a headless kiosk) - skip the preview window and exit on Ctrl+C
+HEADLESS = os.environ.get('DISPLAY') is None
+
+
+def decode_barcodes(image):
+    """Return the decoded text of every barcode found in image"""
+    if ZXING_AVAILABLE:
+        return [result.text for result in zxingcpp.read_barcodes(image)]
+    return [barcode.data.decode('utf-8') for barcode in pyzbar.decode(image)]
+
+
+# Worker processes decode separate regions of multi-barcode frames in parallel.
+# Forked before any thread starts and before OpenCL is initialised; fork keeps
+# the decoder modules loaded and avoids re-running this script in the children,
+# so no pool without fork. Workers ignore SIGINT - the parent handles Ctrl+C.
+decode_pool = None
+if "fork" in multiprocessing.get_all_start_methods() and (os.cpu_count() or 1) > 1:
+    decode_pool = multiprocessing.get_context("fork").Pool(
+        processes=os.cpu_count(),
+        initializer=signal.signal,
+        initargs=(signal.SIGINT, signal.SIG_IGN),
+    )
+
+# Run colour conversion through OpenCL (T-API) when the platform has it
+USE_OPENCL = cv2.ocl.haveOpenCL()
+cv2.ocl.setUseOpenCL(USE_OPENCL)
+
+
+def to_gray(frame, dst):
+    """Convert a BGR frame to grayscale into dst, on the GPU when OpenCL is available"""
+    if USE_OPENCL:
+        return cv2.cvtColor(cv2.UMat(frame), cv2.COLOR_BGR2GRAY).get()
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=dst)
+
+
+def shrink(roi):
+    """Halve an ROI that is wider than MAX_DECODE_WIDTH"""
+    if roi.shape[1] > MAX_DECODE_WIDTH:
+        return cv2.resize(roi, (roi.shape[1] // 2, roi.shape[0] // 2), interpolation=cv2.INTER_AREA)
+    return roi
+
+
+def find_barcode_regions(gray):
+    """Propose barcode-like regions (strong horizontal gradient blobs) in a gray frame"""
+    grad_x = cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3)
+    grad_y = cv2.Sobel(gray, cv2.CV_16S, 0, 1, ksize=3)
+    gradient = cv2.convertScaleAbs(cv2.subtract(cv2.convertScaleAbs(grad_x), cv2.convertScaleAbs(grad_y)))
+    blurred = cv2.blur(gradient, (9, 9))
+    _, thresh = cv2.threshold(blurred, 225, 255, cv2.THRESH_BINARY)
+    closed = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (21, 7)))
+    closed = cv2.dilate(cv2.erode(closed, None, iterations=4), None, iterations=4)
+
+    contours, _ = cv2.findContours(closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    h, w = gray.shape
+    regions = []
+    for contour in contours:
+        x, y, cw, ch = cv2.boundingRect(contour)
+        if cw * ch < MIN_REGION_AREA:
+            continue
+        x0, y0 = max(x - REGION_PAD, 0), max(y - REGION_PAD, 0)
+        x1, y1 = min(x + cw + REGION_PAD, w), min(y + ch + REGION_PAD, h)
+        regions.append(gray[y0:y1, x0:x1].copy())
+    return regions
+
 
 cap = cv2.VideoCapture(0)
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("Camera not working!")
-        break
-    
-    barcodes = pyzbar.decode(frame)
-    for barcode in barcodes:
-        print(f"Found: {barcode.data.decode('utf-8')}")
-    
-    cv2.imshow('Barcode Test', frame)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+# Ask for compressed 640x480 frames instead of the driver's YUYV/max-res default,
+# and keep only one buffered frame so decoding never works on stale images
+cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+# Last on purpose - a format change can reinitialise the driver's buffer queue
+cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+frame_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or 640
+frame_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 480
+
+# Latest frame from the capture thread - a single preallocated buffer that is
+# overwritten in place; readers only touch it while holding frame_lock
+frame_lock = threading.Lock()
+frame_holder = {"frame": np.empty((frame_h, frame_w, 3), np.uint8), "seq": 0}
+running = True
+
+
+def capture_loop():
+    global running
+    while running:
+        # grab() waits on the camera outside the lock; retrieve() decodes into the shared buffer
+        if not cap.grab():
+            print("Camera not working!")
+            running = False
+            break
+        with frame_lock:
+            ret, frame = cap.retrieve(frame_holder["frame"])
+            if ret:
+                frame_holder["frame"] = frame
+                frame_holder["seq"] += 1
+
+
+def decode_loop():
+    last_seq = 0
+    gray = np.empty((frame_h, frame_w), np.uint8)
+    last_gray = np.empty_like(gray)
+    diff = np.empty_like(gray)
+    have_last = False
+    last_decode_time = 0.0
+    last_decoded = None
+    last_printed_time = 0.0
+    while running:
+        with frame_lock:
+            seq = frame_holder["seq"]
+            fresh = seq - last_seq >= DECODE_EVERY
+            if fresh:
+                gray = to_gray(frame_holder["frame"], gray)
+        if not fresh:
+            time.sleep(0.005)
+            continue
+        last_seq = seq
+
+        # Skip frames that barely differ from the last decoded one
+        now = time.monotonic()
+        if (have_last and gray.shape == last_gray.shape
+                and now - last_decode_time < REPEAT_SUPPRESS_S
+                and cv2.absdiff(gray, last_gray, dst=diff).mean() < MOTION_THRESHOLD):
+            continue
+        gray, last_gray = last_gray, gray
+        have_last = True
+        last_decode_time = now
+
+        # Decode the barcode-like regions themselves; several go one per core when there is a pool
+        regions = [shrink(region) for region in find_barcode_regions(last_gray)]
+        if len(regions) > 1 and decode_pool:
+            found = [data for result in decode_pool.map(decode_barcodes, regions) for data in result]
+        elif regions:
+            found = [data for region in regions for data in decode_barcodes(region)]
+        else:
+            # No candidate region - ZBar only needs luminance, decode the centre of the gray frame
+            h, w = last_gray.shape
+            found = decode_barcodes(shrink(last_gray[h//4:3*h//4, w//4:3*w//4]))
+
+        for data in found:
+            if data == last_decoded and now - last_printed_time < REPEAT_SUPPRESS_S:
+                continue
+            last_decoded = data
+            last_printed_time = now
+            print(f"Found: {data}")
+
+
+def stop(signum, frame):
+    global running
+    running = False
+
+
+capture_thread = threading.Thread(target=capture_loop, daemon=True)
+decode_thread = threading.Thread(target=decode_loop, daemon=True)
+capture_thread.start()
+decode_thread.start()
+
+if HEADLESS:
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    print("No display - running headless, press Ctrl+C to quit")
+    while running:
+        time.sleep(0.2)
+else:
+    while running:
+        with frame_lock:
+            if frame_holder["seq"]:
+                cv2.imshow('Barcode Test', frame_holder["frame"])
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
 
+running = False
+capture_thread.join(timeout=1)
+decode_thread.join(timeout=1)
 cap.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+if decode_pool:
+    decode_pool.terminate()
+if not HEADLESS:
+    cv2.destroyAllWindows()
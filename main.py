@@ -9,13 +9,17 @@ Control: Use MOUSE
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog, simpledialog
-import cv2
-from pyzbar import pyzbar
+from tkinter import ttk, messagebox, filedialog, simpledialog, font as tkfont
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import sqlite3
 import threading
 import json
+import queue
+import re
+from itertools import groupby
+from collections import OrderedDict
 from datetime import datetime
 from PIL import Image, ImageTk
 import os
@@ -35,8 +39,25 @@ except ImportError:
 
 # Configuration
 API_BASE_URL = "http://localhost/api"  # Change if API is hosted elsewhere
+API_CONNECT_TIMEOUT = 1.0  # Seconds to establish a connection - fail fast when offline
+PRODUCT_URL = f"{API_BASE_URL}/get_product.php"
 SQLITE_DB = "nutrition_cache.db"
+WRITE_BATCH_MAX = 32      # Most queued cache/history writes committed in one transaction
+WRITE_BATCH_WAIT = 0.05   # Seconds the writer waits for more work before committing
+PRODUCT_MEMO_SIZE = 256   # Recently looked-up products kept in memory in front of SQLite
 PICTURES_DIR = "/home/pi/Pictures"  # Changed to specific path
+JPEG_QUALITY = 85
+
+# cv2 and pyzbar are slow to import on a Pi - loaded by _lazy_cv() on first camera/image use
+cv2 = None
+pyzbar = None
+# Barcode decoding - only retail product symbologies, on a downscaled gray frame
+BARCODE_SYMBOLS = None
+DECODE_MAX_WIDTH = 640  # Wider camera frames are halved before decoding
+DECODE_INTERVAL = 0.1   # Seconds between decodes - a held-up barcode spans many frames
+DETECT_PAD = 16        # Pixels of margin kept around an OpenCV-detected barcode region
+DETECT_FULL_PASS_EVERY = 5  # Full ZBar pass every N decodes while the detector sees nothing
+PREVIEW_INTERVAL_MS = 66  # Camera preview refresh period on the Tk thread (~15 fps)
 
 # Create Pictures directory if it doesn't exist
 if not os.path.exists(PICTURES_DIR):
@@ -50,6 +71,252 @@ if not os.path.exists(PICTURES_DIR):
             os.makedirs(PICTURES_DIR)
         print(f"Using fallback directory: {PICTURES_DIR}")
 
+
+def _lazy_cv():
+    """Import cv2 and pyzbar on first use"""
+    global cv2, pyzbar, BARCODE_SYMBOLS
+    if cv2 is not None:
+        return
+    from pyzbar import pyzbar as _pyzbar
+    import cv2 as _cv2
+    pyzbar = _pyzbar
+    BARCODE_SYMBOLS = [_pyzbar.ZBarSymbol.EAN13, _pyzbar.ZBarSymbol.UPCA,
+                       _pyzbar.ZBarSymbol.EAN8, _pyzbar.ZBarSymbol.UPCE]
+    # Set last - other threads treat a non-None cv2 as "everything loaded"
+    cv2 = _cv2
+
+
+# Shared HTTP session - keeps the API connection alive between requests
+http_session = requests.Session()
+_http_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=10,
+    # Only gateway errors are retried - an unreachable or slow server still
+    # fails within one connect/read timeout
+    max_retries=Retry(total=3, connect=0, read=0, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+)
+http_session.mount("http://", _http_adapter)
+http_session.mount("https://", _http_adapter)
+
+# SQLite tuning - WAL lets readers run alongside writes and NORMAL sync
+# avoids an fsync per commit on the SD card. Temp tables and an 8 MB page
+# cache stay in RAM, and up to 64 MB of the file is read through mmap.
+# page_size only takes effect on a brand-new database file, so it must
+# come before the switch to WAL.
+SQLITE_PRAGMAS = """
+    PRAGMA page_size=8192;
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-8000;
+    PRAGMA mmap_size=67108864;
+    PRAGMA busy_timeout=5000;
+"""
+
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        barcode TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        brand TEXT,
+        category TEXT,
+        calories INTEGER,
+        protein REAL,
+        carbs REAL,
+        sugar REAL,
+        fats REAL,
+        saturated_fats REAL,
+        fiber REAL,
+        sodium REAL,
+        allergens TEXT,
+        health_score INTEGER,
+        is_healthy INTEGER,
+        cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        allergen_mask INTEGER DEFAULT 0
+    );
+    
+    CREATE TABLE IF NOT EXISTS scan_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        barcode TEXT NOT NULL,
+        scanned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        is_healthy INTEGER,
+        has_allergen INTEGER,
+        name TEXT
+    );
+    
+    CREATE INDEX IF NOT EXISTS idx_scan_time ON scan_history(scanned_at DESC);
+    
+    -- Covering index - the stats query reads only these two columns, so it
+    -- scans this small index instead of the whole history table
+    CREATE INDEX IF NOT EXISTS idx_scan_flags ON scan_history(is_healthy, has_allergen);
+    
+    CREATE TABLE IF NOT EXISTS user_preferences (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        preference_key TEXT UNIQUE NOT NULL,
+        preference_value TEXT
+    );
+"""
+
+# Upsert that leaves unchanged rows untouched instead of delete + re-insert
+PRODUCT_UPSERT_SQL = """
+    INSERT INTO products
+    (barcode, name, brand, category, calories, protein, carbs, sugar, fats,
+     saturated_fats, fiber, sodium, allergens, health_score, is_healthy, allergen_mask, cached_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(barcode) DO UPDATE SET
+        name = excluded.name,
+        brand = excluded.brand,
+        category = excluded.category,
+        calories = excluded.calories,
+        protein = excluded.protein,
+        carbs = excluded.carbs,
+        sugar = excluded.sugar,
+        fats = excluded.fats,
+        saturated_fats = excluded.saturated_fats,
+        fiber = excluded.fiber,
+        sodium = excluded.sodium,
+        allergens = excluded.allergens,
+        health_score = excluded.health_score,
+        is_healthy = excluded.is_healthy,
+        allergen_mask = excluded.allergen_mask,
+        cached_at = excluded.cached_at
+    WHERE name IS NOT excluded.name
+        OR brand IS NOT excluded.brand
+        OR category IS NOT excluded.category
+        OR calories IS NOT excluded.calories
+        OR protein IS NOT excluded.protein
+        OR carbs IS NOT excluded.carbs
+        OR sugar IS NOT excluded.sugar
+        OR fats IS NOT excluded.fats
+        OR saturated_fats IS NOT excluded.saturated_fats
+        OR fiber IS NOT excluded.fiber
+        OR sodium IS NOT excluded.sodium
+        OR allergens IS NOT excluded.allergens
+        OR health_score IS NOT excluded.health_score
+        OR is_healthy IS NOT excluded.is_healthy
+        OR allergen_mask IS NOT excluded.allergen_mask
+"""
+
+def product_row(product):
+    """PRODUCT_UPSERT_SQL parameters for a product - the only builder for that statement"""
+    # Allergens may arrive as a frozenset, list or comma-separated string
+    allergens = parse_allergens(product.get('allergens'))
+    return (
+        product['barcode'], product['name'], product.get('brand'), product.get('category'),
+        product.get('calories'), product.get('protein'), product.get('carbs'),
+        product.get('sugar'), product.get('fats'), product.get('saturated_fats'),
+        product.get('fiber'), product.get('sodium'),
+        # Sorted so an unchanged allergen set stores the same string and the upsert skips the row
+        ','.join(sorted(allergens)),
+        product.get('health_score'), product.get('is_healthy'), allergen_mask(allergens)
+    )
+
+
+# Explicit column list keeps the cached statement stable if the table gains columns
+PRODUCT_COLUMNS = (
+    "barcode", "name", "brand", "category", "calories", "protein", "carbs", "sugar",
+    "fats", "saturated_fats", "fiber", "sodium", "allergens", "health_score", "is_healthy",
+    "cached_at", "allergen_mask"
+)
+PRODUCT_SELECT_SQL = f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM products WHERE barcode = ?"
+
+SCAN_INSERT_SQL = "INSERT INTO scan_history (barcode, name, is_healthy, has_allergen) VALUES (?, ?, ?, ?)"
+
+# Anything but ASCII 0-9 - scanners and pasted codes can carry CR/LF, spaces,
+# dashes or zero-width characters
+_NON_DIGITS = re.compile(r'[^0-9]')
+
+# Allergens the app knows about, with their checkbox labels
+ALLERGEN_LIST = ("dairy", "nuts", "peanuts", "gluten", "soy",
+                 "eggs", "fish", "shellfish", "coconut", "sesame")
+ALLERGEN_LABELS = tuple(allergen.capitalize() for allergen in ALLERGEN_LIST)
+# One bit per known allergen - a product/user overlap check is a single AND
+ALLERGEN_BITS = {allergen: 1 << i for i, allergen in enumerate(ALLERGEN_LIST)}
+
+# Nutrition Facts rows in the results panel: (label, product key, unit)
+NUTRITION_FIELDS = (
+    ("Calories", "calories", "kcal"),
+    ("Protein", "protein", "g"),
+    ("Carbohydrates", "carbs", "g"),
+    ("Sugar", "sugar", "g"),
+    ("Total Fat", "fats", "g"),
+    ("Saturated Fat", "saturated_fats", "g"),
+    ("Fiber", "fiber", "g"),
+    ("Sodium", "sodium", "g"),
+)
+
+# Health score banner colour per block of ten points: red below 40, orange below 70, then green
+SCORE_COLORS = ("#f44336",) * 4 + ("#ff9800",) * 3 + ("#4caf50",) * 4
+
+# Add Product form layout: (section title, ((label, field name, default, type), ...)).
+# A section without fields is the allergen checkbox grid.
+PRODUCT_FORM_SECTIONS = (
+    ("Basic Information", (
+        ("Product Name *", "name", "", str),
+        ("Brand", "brand", "", str),
+        ("Category", "category", "", str),
+    )),
+    ("Nutrition (per 100g)", (
+        ("Calories (kcal)", "calories", "0", float),
+        ("Protein (g)", "protein", "0.0", float),
+        ("Carbs (g)", "carbs", "0.0", float),
+        ("Sugar (g)", "sugar", "0.0", float),
+        ("Fats (g)", "fats", "0.0", float),
+        ("Saturated Fats (g)", "saturated_fats", "0.0", float),
+        ("Fiber (g)", "fiber", "0.0", float),
+        ("Sodium (g)", "sodium", "0.0", float),
+    )),
+    ("Allergens", None),
+    ("Health Information", (
+        ("Health Score (0-100)", "health_score", "50", int),
+    )),
+)
+
+
+# Named fonts shared by every widget, keyed by (size, weight)
+_FONTS = {}
+
+
+def ui_font(size, weight="normal"):
+    """Shared Arial font - Tk resolves each size/weight once instead of per widget"""
+    font = _FONTS.get((size, weight))
+    if font is None:
+        font = _FONTS[(size, weight)] = tkfont.Font(family="Arial", size=size, weight=weight)
+    return font
+
+
+def normalize_barcode(barcode):
+    """Barcode reduced to its digits - the form products are stored and looked up under"""
+    return _NON_DIGITS.sub('', barcode)
+
+
+def parse_allergens(allergens):
+    """Frozenset of allergen names from a list or comma-separated string"""
+    if isinstance(allergens, str):
+        allergens = allergens.split(',') if allergens else ()
+    return frozenset(allergens or ())
+
+
+def allergen_mask(allergens):
+    """Bitmask of the known allergens in a list or comma-separated string"""
+    if isinstance(allergens, str):
+        allergens = allergens.split(',') if allergens else ()
+    mask = 0
+    for allergen in allergens or ():
+        mask |= ALLERGEN_BITS.get(allergen, 0)
+    return mask
+
+
+def open_db():
+    """Open a connection to the local cache with tuning PRAGMAs applied"""
+    # Autocommit mode - multi-statement writes issue their own BEGIN IMMEDIATE / COMMIT
+    # cached_statements keeps the prepared lookup/upsert statements around between scans
+    conn = sqlite3.connect(SQLITE_DB, isolation_level=None, check_same_thread=False,
+                           cached_statements=128)
+    conn.executescript(SQLITE_PRAGMAS)
+    return conn
+
+
 # LED Colors
 RED = (255, 0, 0)
 GREEN = (0, 255, 0)
@@ -61,6 +328,19 @@ CYAN = (0, 255, 255)
 WHITE = (255, 255, 255)
 OFF = (0, 0, 0)
 
+
+def _dim_ramp(color):
+    """Color at 0, 5, ..., 100% brightness"""
+    r, g, b = color
+    return [(r * level // 100, g * level // 100, b * level // 100) for level in range(0, 101, 5)]
+
+
+# Pulse animation brightness steps, computed once per LED color
+PULSE_TABLES = {color: _dim_ramp(color) for color in (RED, GREEN, ORANGE, BLUE, YELLOW, PURPLE, CYAN)}
+
+# Full 64-pixel frames for the rainbow animation, so set_pixels gets a ready-made buffer
+RAINBOW_FRAMES = [[color] * 64 for color in (RED, ORANGE, YELLOW, GREEN, CYAN, BLUE, PURPLE)]
+
 class NutritionScannerApp:
     def __init__(self, root):
         self.root = root
@@ -79,12 +359,22 @@ class NutritionScannerApp:
         self.init_sqlite_db()
         
         # Variables
-        self.is_online = self.check_connection()
+        self.is_online = None  # Unknown until the startup probe answers - lookups use the cache until then
         self.scanning = False
         self.camera = None
         self.user_allergens = self.load_user_allergens()
+        self.user_allergen_mask = allergen_mask(self.user_allergens)
+        # Settings dialog checkbox state, kept for the life of the app
+        self._allergen_vars = {a: tk.BooleanVar(value=a in self.user_allergens) for a in ALLERGEN_LIST}
+        self.known_barcodes = self.load_known_barcodes()
+        self._product_memo = OrderedDict()  # barcode -> product, least recently used first
+        self._led_stop = threading.Event()  # Set to cancel the running LED animation
+        # All SenseHat I2C traffic happens on one worker thread, never on the GUI thread
+        self._led_q = queue.Queue()
         self.led_thread = None
-        self.led_animation_running = False
+        if SENSEHAT_AVAILABLE:
+            self.led_thread = threading.Thread(target=self._led_worker, daemon=True)
+            self.led_thread.start()
         
         # Variables for Add Product feature
         self.adding_product = False
@@ -93,15 +383,43 @@ class NutritionScannerApp:
         self.capture_ready = False
         self.detected_barcode = None
         self.latest_frame = None
-        
-        # Statistics
-        self.total_scans = self.get_total_scans()
-        self.healthy_scans = self.get_healthy_scans()
-        self.allergen_warnings = self.get_allergen_warnings()
+        self.frame_lock = threading.Lock()
+        self._frame_seq = 0
+        self._preview_seq = 0
+        self._barcode_overlay = None
+        self._last_decode_ts = 0.0
+        
+        # Product photos are encoded and written to the SD card off the camera/GUI threads
+        self._pics_dirfd = None
+        if os.open in os.supports_dir_fd:
+            # Open the Pictures directory once so each save skips the path lookup
+            self._pics_dirfd = os.open(PICTURES_DIR, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+        self._save_q = queue.Queue()
+        # Paths handed to the writer but not yet on disk - held so two quick captures can't pick the same name
+        self._pending_images = set()
+        self._pending_images_lock = threading.Lock()
+        self._save_thread = threading.Thread(target=self._image_writer, daemon=True)
+        self._save_thread.start()
+        
+        self._lookup_seq = 0  # Bumped per product lookup so stale results are dropped
+        
+        # Product cache and scan history writes are committed in batches by one writer thread
+        self._write_q = queue.Queue()
+        self._db_writer_thread = threading.Thread(target=self._db_writer, daemon=True)
+        self._db_writer_thread.start()
+        
+        # Statistics - _record_scan runs on lookup threads, so the counters are
+        # only changed while holding _stats_lock
+        self._stats_lock = threading.Lock()
+        self._stats_resyncs = []  # Per pending resync: scans recorded since it was queued
+        self.total_scans, self.healthy_scans, self.allergen_warnings = self._load_stats()
         
         # Create GUI
         self.create_gui()
         
+        # Probe the API in the background so the window draws immediately
+        threading.Thread(target=self._probe_connection, daemon=True).start()
+        
         print("SUCCESS: Application started successfully")
         print("INFO: Mouse control is always enabled")
         if SENSEHAT_AVAILABLE:
@@ -109,194 +427,249 @@ class NutritionScannerApp:
     
     def init_sqlite_db(self):
         """Initialize SQLite database for offline cache"""
-        conn = sqlite3.connect(SQLITE_DB)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                barcode TEXT UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                brand TEXT,
-                category TEXT,
-                calories INTEGER,
-                protein REAL,
-                carbs REAL,
-                sugar REAL,
-                fats REAL,
-                saturated_fats REAL,
-                fiber REAL,
-                sodium REAL,
-                allergens TEXT,
-                health_score INTEGER,
-                is_healthy INTEGER,
-                cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS scan_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                barcode TEXT NOT NULL,
-                scanned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                is_healthy INTEGER,
-                has_allergen INTEGER
-            )
-        ''')
+        # One connection for the app's lifetime, shared with the camera/LED threads
+        self.conn = open_db()
+        self._db_lock = threading.Lock()
+        cursor = self.conn.cursor()
+        
+        # Tables and indexes in one script - existing ones are left as they are
+        self.conn.executescript(SQLITE_SCHEMA)
+        
+        # Databases from before allergen_mask existed - add the column and fill it in
+        product_columns = {row[1] for row in cursor.execute("PRAGMA table_info(products)")}
+        if "allergen_mask" not in product_columns:
+            cursor.execute("ALTER TABLE products ADD COLUMN allergen_mask INTEGER DEFAULT 0")
+            masks = [(allergen_mask(allergens), barcode)
+                     for barcode, allergens in cursor.execute("SELECT barcode, allergens FROM products")]
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany("UPDATE products SET allergen_mask = ? WHERE barcode = ?", masks)
+        
+        # Product name is stored with each scan so the history view needs no join
+        history_columns = {row[1] for row in cursor.execute("PRAGMA table_info(scan_history)")}
+        if "name" not in history_columns:
+            cursor.execute("ALTER TABLE scan_history ADD COLUMN name TEXT")
+            cursor.execute('''
+                UPDATE scan_history
+                SET name = (SELECT p.name FROM products p WHERE p.barcode = scan_history.barcode)
+            ''')
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_preferences (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                preference_key TEXT UNIQUE NOT NULL,
-                preference_value TEXT
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
         print("SUCCESS: SQLite database initialized")
     
     def load_user_allergens(self):
         """Load user's allergen preferences"""
-        conn = sqlite3.connect(SQLITE_DB)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT preference_value FROM user_preferences WHERE preference_key='allergens'")
-        row = cursor.fetchone()
-        conn.close()
+        with self._db_lock:
+            row = self.conn.execute(
+                "SELECT preference_value FROM user_preferences WHERE preference_key='allergens'"
+            ).fetchone()
         
         if row and row[0]:
-            return set(row[0].split(','))
-        return set()
+            return frozenset(row[0].split(','))
+        return frozenset()
+    
+    def load_known_barcodes(self):
+        """Load the set of barcodes present in the local cache"""
+        with self._db_lock:
+            return {row[0] for row in self.conn.execute("SELECT barcode FROM products")}
     
     def save_user_allergens(self, allergens):
         """Save user's allergen preferences"""
-        conn = sqlite3.connect(SQLITE_DB)
-        cursor = conn.cursor()
-        
         allergen_str = ','.join(allergens)
-        cursor.execute('''
-            INSERT OR REPLACE INTO user_preferences (preference_key, preference_value)
-            VALUES ('allergens', ?)
-        ''', (allergen_str,))
-        
-        conn.commit()
-        conn.close()
-        self.user_allergens = allergens
+        with self._db_lock:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO user_preferences (preference_key, preference_value)
+                VALUES ('allergens', ?)
+            ''', (allergen_str,))
+        
+        self.user_allergens = frozenset(allergens)
+        self.user_allergen_mask = allergen_mask(allergens)
+    
+    def _load_stats(self):
+        """Get (total scans, healthy scans, allergen warnings) in a single pass"""
+        with self._db_lock:
+            return self.conn.execute('''
+                SELECT COUNT(*),
+                       COALESCE(SUM(is_healthy = 1), 0),
+                       COALESCE(SUM(has_allergen = 1), 0)
+                FROM scan_history
+            ''').fetchone()
     
-    def get_total_scans(self):
-        """Get total number of scans"""
-        conn = sqlite3.connect(SQLITE_DB)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM scan_history")
-        count = cursor.fetchone()[0]
-        conn.close()
-        return count
+    def _resync_stats(self):
+        """Reload the scan counters from the database without blocking the caller"""
+        since = [0, 0, 0]
+        
+        def reload():
+            # Writer thread - every scan queued before this request is committed,
+            # every later one is counted in since
+            counts = self._load_stats()
+            with self._stats_lock:
+                self._stats_resyncs.remove(since)
+                self.total_scans, self.healthy_scans, self.allergen_warnings = (
+                    count + extra for count, extra in zip(counts, since))
+            self.root.after(0, self._show_scan_count)
+        
+        with self._stats_lock:
+            self._stats_resyncs.append(since)
+            self._write_q.put(reload)
     
-    def get_healthy_scans(self):
-        """Get number of healthy product scans"""
-        conn = sqlite3.connect(SQLITE_DB)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM scan_history WHERE is_healthy = 1")
-        count = cursor.fetchone()[0]
-        conn.close()
-        return count
+    def _show_scan_count(self):
+        """Refresh the status bar scan counter"""
+        self.scan_counter_label.config(text=f"Total Scans: {self.total_scans}")
     
-    def get_allergen_warnings(self):
-        """Get number of allergen warnings"""
-        conn = sqlite3.connect(SQLITE_DB)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM scan_history WHERE has_allergen = 1")
-        count = cursor.fetchone()[0]
-        conn.close()
-        return count
+    def _record_scan(self, barcode, name, is_healthy, has_allergen):
+        """Queue a scan_history row for the writer thread"""
+        # Queueing and counting together puts the row on one side of any pending resync
+        with self._stats_lock:
+            self._write_q.put((SCAN_INSERT_SQL, (barcode, name, is_healthy, has_allergen)))
+            # Keep the in-memory statistics current without re-aggregating the table
+            self.total_scans += 1
+            self.healthy_scans += is_healthy == 1
+            self.allergen_warnings += has_allergen == 1
+            for since in self._stats_resyncs:
+                since[0] += 1
+                since[1] += is_healthy == 1
+                since[2] += has_allergen == 1
+    
+    def _db_writer(self):
+        """Background writer - commit queued (sql, params) writes in batches"""
+        while True:
+            items = [self._write_q.get()]
+            # Gather whatever else arrives shortly after, e.g. the scan row for a cached product
+            while items[-1] is not None and len(items) < WRITE_BATCH_MAX:
+                try:
+                    items.append(self._write_q.get(timeout=WRITE_BATCH_WAIT))
+                except queue.Empty:
+                    break
+            
+            # Any failure is reported and the thread keeps going - a dead writer
+            # would leave every later _write_q.join() waiting forever
+            try:
+                self._run_queued(items)
+            except Exception as e:
+                print(f"ERROR: Could not write queued database changes: {e}")
+            finally:
+                for _ in items:
+                    self._write_q.task_done()
+            
+            if items[-1] is None:
+                break
+    
+    def _run_queued(self, items):
+        """Run a batch of queued items in order - callables run after every write queued before them"""
+        writes = []
+        for item in items:
+            if callable(item):
+                self._commit_writes(writes)
+                writes = []
+                try:
+                    item()
+                except Exception as e:
+                    print(f"ERROR: Queued database task failed: {e}")
+            elif item is not None:
+                writes.append(item)
+        self._commit_writes(writes)
+    
+    def _commit_writes(self, writes):
+        """Commit (sql, params) writes in one transaction - runs of the same statement use executemany"""
+        if not writes:
+            return
+        with self._db_lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            for sql, group in groupby(writes, key=lambda write: write[0]):
+                self.conn.executemany(sql, [params for _, params in group])
     
     def check_connection(self):
         """Check if we have internet connection to API"""
         try:
-            response = requests.get(f"{API_BASE_URL}/test_connection.php", timeout=3)
+            # Only the status matters - HEAD skips transferring the response body
+            response = http_session.head(f"{API_BASE_URL}/test_connection.php", timeout=(API_CONNECT_TIMEOUT, 3))
             return response.status_code == 200
         except:
             return False
     
+    def _probe_connection(self):
+        """Background connection check - reports the result on the GUI thread"""
+        ok = self.check_connection()
+        self.root.after(0, self._set_online, ok)
+    
+    def _set_online(self, ok):
+        """Record connection state and update the status bar"""
+        self.is_online = ok
+        status_color = "#4caf50" if ok else "#ff9800"
+        status_text = "ONLINE" if ok else "OFFLINE"
+        self.status_label.config(text=status_text, fg=status_color)
+    
     def set_led_color(self, color, pattern='solid'):
         """Set SenseHat LED color"""
         if not SENSEHAT_AVAILABLE:
             return
         
-        self.led_animation_running = False
-        if self.led_thread and self.led_thread.is_alive():
-            time.sleep(0.1)
-        
-        if pattern == 'solid':
-            sense.clear(color)
-        elif pattern == 'flash':
-            self.led_animation_running = True
-            self.led_thread = threading.Thread(target=self._flash_led, args=(color,), daemon=True)
-            self.led_thread.start()
-        elif pattern == 'pulse':
-            self.led_animation_running = True
-            self.led_thread = threading.Thread(target=self._pulse_led, args=(color,), daemon=True)
-            self.led_thread.start()
-        elif pattern == 'rainbow':
-            self.led_animation_running = True
-            self.led_thread = threading.Thread(target=self._rainbow_animation, daemon=True)
-            self.led_thread.start()
+        # Cancel the current animation; each request gets its own stop event,
+        # so a request that is already superseded is skipped by the worker
+        self._led_stop.set()
+        self._led_stop = stop = threading.Event()
+        self._led_q.put((color, pattern, stop))
+    
+    def _led_worker(self):
+        """Background LED thread - run queued colour/animation requests in order"""
+        while True:
+            item = self._led_q.get()
+            if item is None:
+                break
+            
+            color, pattern, stop = item
+            if stop.is_set():
+                continue
+            if pattern == 'solid':
+                sense.clear(color)
+            elif pattern == 'flash':
+                self._flash_led(color, stop)
+            elif pattern == 'pulse':
+                self._pulse_led(color, stop)
+            elif pattern == 'rainbow':
+                self._rainbow_animation(stop)
     
-    def _flash_led(self, color):
+    def _flash_led(self, color, stop):
         """Flash LED pattern"""
         for _ in range(6):
-            if not self.led_animation_running:
-                break
             sense.clear(color)
-            time.sleep(0.3)
+            if stop.wait(0.3):
+                return
             sense.clear()
-            time.sleep(0.3)
-        if self.led_animation_running:
-            sense.clear(color)
+            if stop.wait(0.3):
+                return
+        sense.clear(color)
     
-    def _pulse_led(self, color):
+    def _pulse_led(self, color, stop):
         """Pulse LED pattern"""
-        r, g, b = color
+        ramp = PULSE_TABLES.get(color) or _dim_ramp(color)
+        # Fade up 0-95%, then down 100-5%
+        steps = ramp[:-1] + ramp[:0:-1]
         for _ in range(3):
-            if not self.led_animation_running:
-                break
-            for brightness in range(0, 100, 5):
-                if not self.led_animation_running:
-                    break
-                dim_color = (r * brightness // 100, g * brightness // 100, b * brightness // 100)
+            for dim_color in steps:
                 sense.clear(dim_color)
-                time.sleep(0.02)
-            for brightness in range(100, 0, -5):
-                if not self.led_animation_running:
-                    break
-                dim_color = (r * brightness // 100, g * brightness // 100, b * brightness // 100)
-                sense.clear(dim_color)
-                time.sleep(0.02)
-        if self.led_animation_running:
-            sense.clear(color)
+                if stop.wait(0.02):
+                    return
+        sense.clear(color)
     
-    def _rainbow_animation(self):
+    def _rainbow_animation(self, stop):
         """Rainbow animation for SenseHat"""
-        colors = [RED, ORANGE, YELLOW, GREEN, CYAN, BLUE, PURPLE]
         for _ in range(10):
-            if not self.led_animation_running:
-                break
-            for color in colors:
-                if not self.led_animation_running:
-                    break
-                sense.clear(color)
-                time.sleep(0.1)
+            for pixels in RAINBOW_FRAMES:
+                sense.set_pixels(pixels)
+                if stop.wait(0.1):
+                    return
     
-    def _update_camera_label_from_array(self, frame):
+    def _update_camera_label_from_array(self, frame, interpolation=None):
         """Update camera label with frame"""
         try:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_pil = Image.fromarray(frame_rgb)
-            frame_pil = frame_pil.resize((480, 360))
-            frame_tk = ImageTk.PhotoImage(frame_pil)
-            self.camera_label.config(image=frame_tk, text="")
-            self.camera_label.image = frame_tk
+            # Shrink first so the colour conversion only touches preview-sized pixels
+            cv2.resize(frame, (480, 360), dst=self._resize_buf,
+                       interpolation=cv2.INTER_LINEAR if interpolation is None else interpolation)
+            cv2.cvtColor(self._resize_buf, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+            self.preview_photo.paste(Image.frombuffer("RGB", (480, 360), self._rgb_buf, "raw", "RGB", 0, 1))
+            if self.camera_label.cget("image") != str(self.preview_photo):
+                self.camera_label.config(image=self.preview_photo, text="")
         except:
             pass
     
@@ -324,10 +697,11 @@ class NutritionScannerApp:
     
     def test_pyzbar(self):
         """Test if pyzbar is working"""
-        import numpy as np
-        test_img = np.ones((100, 200, 3), dtype=np.uint8) * 255
+        # Same input the scan loop uses - a single-channel frame and the retail symbologies
+        test_img = np.full((100, 200), 255, dtype=np.uint8)
         try:
-            result = pyzbar.decode(test_img)
+            _lazy_cv()
+            result = pyzbar.decode(test_img, symbols=BARCODE_SYMBOLS)
             print(f"Pyzbar test: Working! (returned {len(result)} barcodes)")
             return True
         except Exception as e:
@@ -340,14 +714,75 @@ class NutritionScannerApp:
             )
             return False
     
+    def _image_writer(self):
+        """Background writer - save queued (path, frame) pairs as JPEG"""
+        while True:
+            item = self._save_q.get()
+            if item is None:
+                break
+            image_path, frame = item
+            try:
+                ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+                if not ok:
+                    print(f"ERROR: Could not encode image {image_path}")
+                    continue
+                if self._pics_dirfd is not None and os.path.dirname(image_path) == PICTURES_DIR:
+                    fd = os.open(os.path.basename(image_path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                                 0o644, dir_fd=self._pics_dirfd)
+                else:
+                    fd = os.open(image_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                try:
+                    data = memoryview(buf)
+                    while data:
+                        data = data[os.write(fd, data):]
+                finally:
+                    os.close(fd)
+                print(f"INFO: Saved image to {image_path}")
+            except Exception as e:
+                print(f"ERROR: Could not write image {image_path}: {e}")
+            finally:
+                with self._pending_images_lock:
+                    self._pending_images.discard(image_path)
+    
+    def _reserve_image_path(self, base):
+        """Pick an unused PICTURES_DIR path for base and hold it until the writer has saved it"""
+        with self._pending_images_lock:
+            image_path = os.path.join(PICTURES_DIR, f"{base}.jpg")
+            counter = 1
+            while image_path in self._pending_images or os.path.exists(image_path):
+                image_path = os.path.join(PICTURES_DIR, f"{base}_{counter}.jpg")
+                counter += 1
+            self._pending_images.add(image_path)
+        return image_path
+    
     def quit_app(self):
         """Quit application and cleanup"""
-        self.led_animation_running = False
+        self.shutdown()
+        self.root.quit()
+    
+    def shutdown(self):
+        """Release the camera, flush background writers and close the database - safe to call twice"""
+        if self.conn is None:
+            return
+        self._led_stop.set()
+        if self.led_thread:
+            self._led_q.put(None)
+            self.led_thread.join(timeout=1)
         if SENSEHAT_AVAILABLE:
             sense.clear()
         if self.camera:
             self.camera.release()
-        self.root.quit()
+        # Let any queued photos finish writing
+        self._save_q.put(None)
+        self._save_thread.join(timeout=5)
+        if self._pics_dirfd is not None:
+            os.close(self._pics_dirfd)
+        # Commit any queued cache/history writes before closing the database
+        self._write_q.put(None)
+        self._db_writer_thread.join(timeout=5)
+        with self._db_lock:
+            self.conn.close()
+            self.conn = None
     
     def create_gui(self):
         """Create the main GUI interface"""
@@ -359,7 +794,7 @@ class NutritionScannerApp:
         title_label = tk.Label(
             title_frame,
             text="Smart Nutrition Scanner",
-            font=("Arial", 20, "bold"),
+            font=ui_font(20, "bold"),
             bg="#4a90e2",
             fg="white"
         )
@@ -371,7 +806,7 @@ class NutritionScannerApp:
             command=self.quit_app,
             bg="#f44336",
             fg="white",
-            font=("Arial", 14, "bold"),
+            font=ui_font(14, "bold"),
             width=6,
             relief=tk.FLAT
         )
@@ -381,15 +816,13 @@ class NutritionScannerApp:
         status_frame = tk.Frame(self.root, bg="#e8e8e8", height=50)
         status_frame.pack(fill=tk.X)
         
-        status_color = "#4caf50" if self.is_online else "#ff9800"
-        status_text = "ONLINE" if self.is_online else "OFFLINE"
-        
+        # The startup probe replaces this once the API has answered
         self.status_label = tk.Label(
             status_frame,
-            text=status_text,
-            font=("Arial", 12, "bold"),
+            text="CHECKING...",
+            font=ui_font(12, "bold"),
             bg="#e8e8e8",
-            fg=status_color
+            fg="#757575"
         )
         self.status_label.pack(side=tk.LEFT, padx=20, pady=10)
         
@@ -398,7 +831,7 @@ class NutritionScannerApp:
         self.allergen_status_label = tk.Label(
             status_frame,
             text=allergen_text,
-            font=("Arial", 11),
+            font=ui_font(11),
             bg="#e8e8e8",
             fg="#f44336" if allergen_count > 0 else "#666"
         )
@@ -407,7 +840,7 @@ class NutritionScannerApp:
         self.scan_counter_label = tk.Label(
             status_frame,
             text=f"Total Scans: {self.total_scans}",
-            font=("Arial", 11),
+            font=ui_font(11),
             bg="#e8e8e8",
             fg="#2196f3"
         )
@@ -417,7 +850,7 @@ class NutritionScannerApp:
             led_status = tk.Label(
                 status_frame,
                 text="LED Ready",
-                font=("Arial", 11),
+                font=ui_font(11),
                 bg="#e8e8e8",
                 fg="#4caf50"
             )
@@ -429,7 +862,7 @@ class NutritionScannerApp:
             command=self.open_settings,
             bg="#9c27b0",
             fg="white",
-            font=("Arial", 11, "bold"),
+            font=ui_font(11, "bold"),
             relief=tk.FLAT,
             padx=15,
             pady=8
@@ -442,7 +875,7 @@ class NutritionScannerApp:
             command=self.refresh_connection,
             bg="#2196f3",
             fg="white",
-            font=("Arial", 11, "bold"),
+            font=ui_font(11, "bold"),
             relief=tk.FLAT,
             padx=15,
             pady=8
@@ -460,16 +893,21 @@ class NutritionScannerApp:
         scan_title = tk.Label(
             left_frame,
             text="Scan Area",
-            font=("Arial", 14, "bold"),
+            font=ui_font(14, "bold"),
             bg="white"
         )
         scan_title.pack(pady=10)
         
-        self.camera_label = tk.Label(left_frame, bg="black", text="Camera Off", fg="white", font=("Arial", 16))
+        self.camera_label = tk.Label(left_frame, bg="black", text="Camera Off", fg="white", font=ui_font(16))
         self.camera_label.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
         
+        # One preview image reused for every camera frame - new frames are pasted in
+        self.preview_photo = ImageTk.PhotoImage(image=Image.new("RGB", (480, 360)))
+        self._resize_buf = np.empty((360, 480, 3), np.uint8)
+        self._rgb_buf = np.empty((360, 480, 3), np.uint8)
+        
         # Status label for capture instructions
-        self.capture_status_label = tk.Label(left_frame, text="", font=("Arial", 12), bg="white", fg="#2196f3")
+        self.capture_status_label = tk.Label(left_frame, text="", font=ui_font(12), bg="white", fg="#2196f3")
         self.capture_status_label.pack()
         
         # Capture button (initially hidden)
@@ -479,7 +917,7 @@ class NutritionScannerApp:
             command=self.capture_product_image,
             bg="#4caf50",
             fg="white",
-            font=("Arial", 14, "bold"),
+            font=ui_font(14, "bold"),
             width=20,
             height=2,
             cursor="hand2"
@@ -496,7 +934,7 @@ class NutritionScannerApp:
             command=self.upload_image,
             bg="#2196f3",
             fg="white",
-            font=("Arial", 13, "bold"),
+            font=ui_font(13, "bold"),
             width=12,
             height=3,
             cursor="hand2"
@@ -509,7 +947,7 @@ class NutritionScannerApp:
             command=self.manual_entry,
             bg="#ff9800",
             fg="white",
-            font=("Arial", 13, "bold"),
+            font=ui_font(13, "bold"),
             width=12,
             height=3,
             cursor="hand2"
@@ -522,7 +960,7 @@ class NutritionScannerApp:
             command=self.view_history,
             bg="#9c27b0",
             fg="white",
-            font=("Arial", 13, "bold"),
+            font=ui_font(13, "bold"),
             width=12,
             height=3,
             cursor="hand2"
@@ -535,7 +973,7 @@ class NutritionScannerApp:
             command=self.view_statistics,
             bg="#00bcd4",
             fg="white",
-            font=("Arial", 13, "bold"),
+            font=ui_font(13, "bold"),
             width=12,
             height=3,
             cursor="hand2"
@@ -549,7 +987,7 @@ class NutritionScannerApp:
             command=self.start_add_product_with_barcode,
             bg="#ff5722",
             fg="white",
-            font=("Arial", 13, "bold"),
+            font=ui_font(13, "bold"),
             width=12,
             height=3,
             cursor="hand2"
@@ -562,7 +1000,7 @@ class NutritionScannerApp:
             command=self.start_add_product_with_image,
             bg="#ff7043",
             fg="white",
-            font=("Arial", 13, "bold"),
+            font=ui_font(13, "bold"),
             width=12,
             height=3,
             cursor="hand2"
@@ -576,7 +1014,7 @@ class NutritionScannerApp:
         results_title = tk.Label(
             right_frame,
             text="Nutrition Information",
-            font=("Arial", 14, "bold"),
+            font=ui_font(14, "bold"),
             bg="white"
         )
         results_title.pack(pady=10)
@@ -597,31 +1035,130 @@ class NutritionScannerApp:
         canvas.pack(side="left", fill="both", expand=True, padx=10, pady=10)
         scrollbar.pack(side="right", fill="y")
         
-        self.show_welcome_message()
-    
-    def show_welcome_message(self):
-        """Show welcome message"""
-        for widget in self.results_frame.winfo_children():
-            widget.destroy()
-        
+        # Status labels that are shown and hidden rather than rebuilt
         welcome_text = "Welcome!\n\nScan a barcode to get started\n\nSet your allergens in Settings"
         welcome_text += "\n\nMouse control is always enabled"
-        
-        welcome = tk.Label(
+        self._welcome_label = tk.Label(
             self.results_frame,
             text=welcome_text,
-            font=("Arial", 13),
+            font=ui_font(13),
             bg="white",
             fg="#666"
         )
-        welcome.pack(pady=50)
+        self._loading_label = tk.Label(
+            self.results_frame,
+            text="Loading product information...",
+            font=ui_font(16),
+            bg="white"
+        )
+        self._build_result_widgets()
+        
+        self.show_welcome_message()
+    
+    def _build_result_widgets(self):
+        """Create the product and error views once - later scans only reconfigure them"""
+        parent = self.results_frame
+        
+        self._name_label = tk.Label(parent, font=ui_font(18, "bold"), bg="white", wraplength=350)
+        self._brand_label = tk.Label(parent, font=ui_font(12), bg="white", fg="#666")
+        
+        self._alert_frame = tk.LabelFrame(
+            parent,
+            text="⚠️ ALLERGEN ALERT",
+            font=ui_font(14, "bold"),
+            bg="#ffebee",
+            fg="#f44336",
+            relief=tk.RAISED,
+            bd=3
+        )
+        self._alert_label = tk.Label(
+            self._alert_frame,
+            font=ui_font(12, "bold"),
+            bg="#ffebee",
+            fg="#f44336",
+            wraplength=350
+        )
+        self._alert_label.pack(padx=10, pady=10)
+        
+        self._score_frame = tk.Frame(parent, relief=tk.RAISED, bd=2)
+        self._score_label = tk.Label(self._score_frame, font=ui_font(14, "bold"), fg="white")
+        self._score_label.pack(pady=10)
+        
+        self._health_label = tk.Label(parent, font=ui_font(12, "bold"), bg="white")
+        
+        self._nutrition_frame = tk.LabelFrame(
+            parent,
+            text="Nutrition Facts (per 100g)",
+            font=ui_font(12, "bold"),
+            bg="white"
+        )
+        # key -> (row frame, value label)
+        self._nutrition_rows = {}
+        for label, key, unit in NUTRITION_FIELDS:
+            row = tk.Frame(self._nutrition_frame, bg="white")
+            tk.Label(row, text=label, font=ui_font(11), bg="white", anchor="w").pack(side=tk.LEFT)
+            value_label = tk.Label(row, font=ui_font(11, "bold"), bg="white", anchor="e")
+            value_label.pack(side=tk.RIGHT)
+            self._nutrition_rows[key] = (row, value_label)
+        
+        self._contains_frame = tk.LabelFrame(
+            parent,
+            text="Contains Allergens",
+            font=ui_font(11, "bold"),
+            bg="white"
+        )
+        self._contains_label = tk.Label(
+            self._contains_frame,
+            font=ui_font(10),
+            bg="white",
+            fg="#666",
+            wraplength=350
+        )
+        self._contains_label.pack(padx=10, pady=5)
+        
+        self._category_label = tk.Label(parent, font=ui_font(10), bg="white", fg="#666")
+        
+        self._error_title = tk.Label(
+            parent,
+            text="Product Not Found",
+            font=ui_font(18, "bold"),
+            bg="white",
+            fg="#f44336"
+        )
+        self._error_message = tk.Label(parent, font=ui_font(12), bg="white", wraplength=350)
+        self._error_hint = tk.Label(
+            parent,
+            text="Try:\n• Adding the product using 'Add Product' button\n• Checking the barcode number\n• Using Manual Entry",
+            font=ui_font(11),
+            bg="white",
+            fg="#666",
+            justify=tk.LEFT
+        )
+    
+    def _clear_results(self):
+        """Empty the results panel - every view is built once and only hidden here"""
+        for widget in self.results_frame.winfo_children():
+            widget.pack_forget()
+    
+    def show_welcome_message(self):
+        """Show welcome message"""
+        self._clear_results()
+        self._welcome_label.pack(pady=50)
     
     def refresh_connection(self):
         """Refresh connection status"""
-        self.is_online = self.check_connection()
-        status_color = "#4caf50" if self.is_online else "#ff9800"
-        status_text = "ONLINE" if self.is_online else "OFFLINE"
-        self.status_label.config(text=status_text, fg=status_color)
+        self.status_label.config(text="CHECKING...", fg="#757575")
+        threading.Thread(
+            target=lambda: self.root.after(0, self._on_connection_refreshed, self.check_connection()),
+            daemon=True
+        ).start()
+    
+    def _on_connection_refreshed(self, ok):
+        """Show the result of a manual connection refresh"""
+        self._set_online(ok)
+        
+        # Resync the counters with the database - the status bar updates when it lands
+        self._resync_stats()
         
         if SENSEHAT_AVAILABLE:
             if self.is_online:
@@ -644,36 +1181,32 @@ class NutritionScannerApp:
         tk.Label(
             settings_window,
             text="My Allergen Preferences",
-            font=("Arial", 16, "bold"),
+            font=ui_font(16, "bold"),
             bg="white"
         ).pack(pady=20)
         
         tk.Label(
             settings_window,
             text="Select your allergens:",
-            font=("Arial", 12),
+            font=ui_font(12),
             bg="white",
             fg="#666"
         ).pack(pady=10)
         
-        # Allergen checkboxes
-        allergen_list = ["dairy", "nuts", "peanuts", "gluten", "soy", 
-                        "eggs", "fish", "shellfish", "coconut", "sesame"]
-        allergen_vars = {}
+        # Allergen checkboxes - reuse the cached vars, discarding any edits from a cancelled dialog
+        allergen_vars = self._allergen_vars
+        for allergen, var in allergen_vars.items():
+            var.set(allergen in self.user_allergens)
         
         allergen_frame = tk.Frame(settings_window, bg="white")
         allergen_frame.pack(pady=20)
         
-        for allergen in allergen_list:
-            var = tk.BooleanVar()
-            var.set(allergen in self.user_allergens)
-            allergen_vars[allergen] = var
-            
+        for allergen, label in zip(ALLERGEN_LIST, ALLERGEN_LABELS):
             cb = tk.Checkbutton(
                 allergen_frame,
-                text=allergen.capitalize(),
-                variable=var,
-                font=("Arial", 12),
+                text=label,
+                variable=allergen_vars[allergen],
+                font=ui_font(12),
                 bg="white",
                 anchor="w"
             )
@@ -707,7 +1240,7 @@ class NutritionScannerApp:
             command=save_allergens,
             bg="#4caf50",
             fg="white",
-            font=("Arial", 12, "bold"),
+            font=ui_font(12, "bold"),
             width=15,
             height=2,
             cursor="hand2"
@@ -720,26 +1253,45 @@ class NutritionScannerApp:
             command=settings_window.destroy,
             bg="#757575",
             fg="white",
-            font=("Arial", 12, "bold"),
+            font=ui_font(12, "bold"),
             width=15,
             height=2,
             cursor="hand2"
         )
         cancel_btn.pack(side=tk.LEFT, padx=10)
 
-    def start_add_product_with_barcode(self):
-        """Add product by entering a barcode (no camera)"""
+    def _require_online(self):
+        """True when online; otherwise tell the user why adding a product has to wait"""
+        if self.is_online is None:
+            # Startup probe still running - not the same as being offline
+            messagebox.showinfo(
+                "Checking Connection",
+                "Still checking the connection to the product database.\n\nPlease try again in a moment."
+            )
+            return False
         if not self.is_online:
             messagebox.showerror(
                 "Offline Mode",
                 "You must be ONLINE to add new products to the database.\n\nPlease connect to the internet and try again."
             )
+            return False
+        return True
+    
+    def start_add_product_with_barcode(self):
+        """Add product by entering a barcode (no camera)"""
+        if not self._require_online():
             return
         
         barcode = simpledialog.askstring("Add Product (Barcode)", "Enter Barcode:")
         if not barcode:
             return
         
+        # Stored exactly as process_barcode will look it up later
+        barcode = normalize_barcode(barcode)
+        if not barcode:
+            messagebox.showerror("Invalid Barcode", "The barcode must contain digits.")
+            return
+        
         # Remove leading zero for UPC-A conversion if needed
         if len(barcode) == 13 and barcode.startswith('0'):
             barcode = barcode[1:]
@@ -752,12 +1304,7 @@ class NutritionScannerApp:
     
     def start_add_product(self):
         """Start the process of adding a new product"""
-        if not self.is_online:
-            messagebox.showerror(
-                "Offline Mode",
-                "You must be ONLINE to add new products to the database.\n\n" +
-                "Please connect to the internet and try again."
-            )
+        if not self._require_online():
             return
         
         # Ask user for capture mode
@@ -773,7 +1320,7 @@ class NutritionScannerApp:
         tk.Label(
             mode_dialog,
             text="Select Capture Mode",
-            font=("Arial", 14, "bold"),
+            font=ui_font(14, "bold"),
             bg="white"
         ).pack(pady=20)
         
@@ -784,7 +1331,7 @@ class NutritionScannerApp:
             text="Manual Capture (Click button when ready)",
             variable=mode_var,
             value="manual",
-            font=("Arial", 12),
+            font=ui_font(12),
             bg="white"
         ).pack(pady=5)
         
@@ -793,7 +1340,7 @@ class NutritionScannerApp:
             text="Auto Capture (Captures immediately on detection)",
             variable=mode_var,
             value="auto",
-            font=("Arial", 12),
+            font=ui_font(12),
             bg="white"
         ).pack(pady=5)
         
@@ -807,6 +1354,7 @@ class NutritionScannerApp:
             self.captured_barcode = None
             self.capture_ready = False
             self.detected_barcode = None
+            self.latest_frame = None
             self.scanning = True
             
             if capture_mode == "manual":
@@ -829,6 +1377,10 @@ class NutritionScannerApp:
                     f"Saves to: {PICTURES_DIR}"
                 )
                 threading.Thread(target=lambda: self.add_product_camera_loop(auto_capture=True), daemon=True).start()
+            
+            # The preview is drawn by the Tk thread itself, polling the newest frame
+            self._preview_seq = 0
+            self.root.after(PREVIEW_INTERVAL_MS, self._update_preview)
         
         tk.Button(
             mode_dialog,
@@ -836,7 +1388,7 @@ class NutritionScannerApp:
             command=start_capture,
             bg="#4caf50",
             fg="white",
-            font=("Arial", 12, "bold"),
+            font=ui_font(12, "bold"),
             width=15,
             height=2
         ).pack(pady=20)
@@ -845,10 +1397,15 @@ class NutritionScannerApp:
         """Camera loop for adding products - supports both auto and manual capture"""
         # Verify pyzbar is operational before proceeding
         if not self.test_pyzbar():
+            self.scanning = False
+            self.adding_product = False
             return
         # Try to open camera with multiple methods
         chosen_idx = None
         backends = [None]
+        # Prefer V4L2 on Linux/Pi - it honors CAP_PROP_BUFFERSIZE
+        if sys.platform.startswith('linux') and hasattr(cv2, 'CAP_V4L2'):
+            backends.insert(0, cv2.CAP_V4L2)
         if hasattr(cv2, 'CAP_DSHOW'):
             backends.append(cv2.CAP_DSHOW)
         if hasattr(cv2, 'CAP_MSMF'):
@@ -888,58 +1445,103 @@ class NutritionScannerApp:
         # Try higher resolution for better barcode detection
         self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
         self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        # Buffer size goes after the format - a format change can reinitialise the
+        # driver's queue, so the one-frame setting must be the last one applied
+        self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         # Enable autofocus if available
         self.camera.set(cv2.CAP_PROP_AUTOFOCUS, 1)
-        # Set buffer size to 1 for real-time capture
-        self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         print(f"Camera settings: {self.camera.get(3)}x{self.camera.get(4)}")
         
+        # OpenCV's barcode detector (4.8+, or contrib builds) is used as a pre-filter when present
+        detector = None
+        detector_factory = (getattr(getattr(cv2, 'barcode', None), 'BarcodeDetector', None)
+                            or getattr(cv2, 'barcode_BarcodeDetector', None))
+        if detector_factory is not None:
+            try:
+                detector = detector_factory()
+            except cv2.error as e:
+                print(f"WARN: OpenCV barcode detector unavailable: {e}")
+        
+        # Capture runs on its own thread and only keeps the newest frame;
+        # this thread decodes whatever frame is latest when it is ready
+        self._frame_seq = 0
+        self._barcode_overlay = None
+        capture_thread = threading.Thread(target=self._capture_frames, daemon=True)
+        capture_thread.start()
+        
         captured = False
         no_barcode_count = 0
+        last_seq = 0
+        detector_misses = 0
         
         while self.scanning and self.adding_product and not captured:
-            ret, frame = self.camera.read()
-            if not ret:
-                break
+            with self.frame_lock:
+                frame = self.latest_frame
+                seq = self._frame_seq
+            if frame is None or seq == last_seq:
+                time.sleep(0.005)
+                continue
             
-            # Keep a copy of the original frame for saving
-            original_frame = frame.copy()
-            self.latest_frame = original_frame
+            # Preview keeps full rate on the capture thread; decode ~10 times a second
+            wait = DECODE_INTERVAL - (time.monotonic() - self._last_decode_ts)
+            if wait > 0:
+                time.sleep(wait)
+                continue
+            self._last_decode_ts = time.monotonic()
+            last_seq = seq
             
-            # Try multiple methods with debugging
-            barcodes = pyzbar.decode(frame)
-            print(f"Attempt 1 (original): {len(barcodes) if barcodes else 0} barcodes")
-
-            gray = None
-            if not barcodes:
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                barcodes = pyzbar.decode(gray)
-                print(f"Attempt 2 (grayscale): {len(barcodes) if barcodes else 0} barcodes")
-
-            if not barcodes:
-                # Try with different threshold values
-                if gray is None:
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                for thresh_val in [100, 127, 150]:
-                    _, binary = cv2.threshold(gray, thresh_val, 255, cv2.THRESH_BINARY)
-                    barcodes = pyzbar.decode(binary)
-                    if barcodes:
-                        print(f"Attempt 3 (threshold {thresh_val}): {len(barcodes)} barcodes")
-                        break
+            # Frames are never modified once published, so no copy is needed
+            original_frame = frame
+            
+            # ZBar only looks at luminance - decode a gray, downscaled copy
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            scale = 1
+            if gray.shape[1] > DECODE_MAX_WIDTH:
+                scale = 2
+                gray = cv2.resize(gray, (gray.shape[1] // 2, gray.shape[0] // 2), interpolation=cv2.INTER_AREA)
+            
+            # Cheap OpenCV detection first - frames with no barcode-like region skip ZBar,
+            # and a detected region is decoded on its own before the full frame
+            barcodes = []
+            offset_x = offset_y = 0
+            candidate = True
+            if detector is not None:
+                found, points = detector.detect(gray)
+                candidate = bool(found) and points is not None
+                if candidate:
+                    x, y, w, h = cv2.boundingRect(points.reshape(-1, 2).astype(np.float32))
+                    offset_x, offset_y = max(x - DETECT_PAD, 0), max(y - DETECT_PAD, 0)
+                    region = gray[offset_y:y + h + DETECT_PAD, offset_x:x + w + DETECT_PAD]
+                    barcodes = pyzbar.decode(region, symbols=BARCODE_SYMBOLS)
+                    detector_misses = 0
+                else:
+                    # The detector misses some codes ZBar can read - still try the full frame now and then
+                    detector_misses += 1
+                    if detector_misses >= DETECT_FULL_PASS_EVERY:
+                        detector_misses = 0
+                        candidate = True
+            
+            if candidate and not barcodes:
+                offset_x = offset_y = 0
+                
+                # Try multiple methods with debugging
+                barcodes = pyzbar.decode(gray, symbols=BARCODE_SYMBOLS)
+                print(f"Attempt 1 (grayscale): {len(barcodes) if barcodes else 0} barcodes")
 
-            if not barcodes:
-                # Try inverting the image
-                if gray is None:
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                inverted = cv2.bitwise_not(gray)
-                barcodes = pyzbar.decode(inverted)
-                print(f"Attempt 4 (inverted): {len(barcodes) if barcodes else 0} barcodes")
+                if not barcodes:
+                    # Try with different threshold values
+                    for thresh_val in [100, 127, 150]:
+                        _, binary = cv2.threshold(gray, thresh_val, 255, cv2.THRESH_BINARY)
+                        barcodes = pyzbar.decode(binary, symbols=BARCODE_SYMBOLS)
+                        if barcodes:
+                            print(f"Attempt 2 (threshold {thresh_val}): {len(barcodes)} barcodes")
+                            break
 
-            # Add visual guide
-            height, width = frame.shape[:2]
-            cv2.rectangle(frame, (width//4, height//4), (3*width//4, 3*height//4), (0, 255, 0), 2)
-            cv2.putText(frame, "Align barcode in box", (width//4, height//4 - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                if not barcodes:
+                    # Try inverting the image
+                    inverted = cv2.bitwise_not(gray)
+                    barcodes = pyzbar.decode(inverted, symbols=BARCODE_SYMBOLS)
+                    print(f"Attempt 3 (inverted): {len(barcodes) if barcodes else 0} barcodes")
 
             # Debug: Check what pyzbar is actually returning
             if barcodes:
@@ -981,20 +1583,18 @@ class NutritionScannerApp:
                 self.captured_image = original_frame
                 self.capture_ready = True
                 
-                # Draw rectangle around barcode
-                (x, y, w, h) = barcode.rect
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 3)
-                cv2.putText(frame, f"{barcode_data} ({barcode_type})", (x, y - 10),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                # Rectangle drawn around the barcode on the live preview, in full-frame coordinates
+                left, top, w, h = barcode.rect
+                rect = ((left + offset_x) * scale, (top + offset_y) * scale, w * scale, h * scale)
+                self._barcode_overlay = (rect, f"{barcode_data} ({barcode_type})")
                 
                 if auto_capture:
                     # Auto capture immediately
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    image_filename = f"{barcode_data}_{timestamp}.jpg"
-                    image_path = os.path.join(PICTURES_DIR, image_filename)
+                    image_path = self._reserve_image_path(f"{barcode_data}_{timestamp}")
                     
-                    cv2.imwrite(image_path, original_frame)
-                    print(f"INFO: Auto-captured and saved to {image_path}")
+                    self._save_q.put((image_path, original_frame))
+                    print(f"INFO: Auto-captured, saving to {image_path}")
                     
                     captured = True
                     self.scanning = False
@@ -1013,6 +1613,7 @@ class NutritionScannerApp:
                 
                 no_barcode_count = 0
             else:
+                self._barcode_overlay = None
                 self.capture_ready = False
                 self.detected_barcode = None
                 self.captured_image = None
@@ -1023,15 +1624,56 @@ class NutritionScannerApp:
                                    "No barcode found - adjust camera position", "#ff9800")
                 if not auto_capture:
                     self.root.after(0, self._enable_capture_button, False)
-            
-            self.root.after(0, self._update_camera_label_from_array, frame.copy())
         
+        capture_thread.join(timeout=1)
         if self.camera:
             self.camera.release()
             self.camera = None
             self.root.after(0, lambda: self.capture_status_label.config(text=""))
         self.root.after(0, self.capture_btn.pack_forget)
     
+    def _capture_frames(self):
+        """Camera producer - keep only the newest frame for the decoder and preview"""
+        while self.scanning and self.adding_product:
+            camera = self.camera
+            if camera is None or not camera.grab():
+                self.scanning = False
+                break
+            ret, frame = camera.retrieve()
+            if not ret:
+                continue
+            
+            with self.frame_lock:
+                self.latest_frame = frame
+                self._frame_seq += 1
+    
+    def _update_preview(self):
+        """Show the newest camera frame - runs on the Tk thread and reschedules itself"""
+        if not (self.scanning and self.adding_product):
+            return
+        self.root.after(PREVIEW_INTERVAL_MS, self._update_preview)
+        
+        with self.frame_lock:
+            frame = self.latest_frame
+            seq = self._frame_seq
+        if frame is None or seq == self._preview_seq:
+            return
+        self._preview_seq = seq
+        
+        # Draw the guide and last detected barcode on a preview copy only
+        preview = frame.copy()
+        height, width = preview.shape[:2]
+        cv2.rectangle(preview, (width//4, height//4), (3*width//4, 3*height//4), (0, 255, 0), 2)
+        cv2.putText(preview, "Align barcode in box", (width//4, height//4 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        overlay = self._barcode_overlay
+        if overlay:
+            (x, y, w, h), label = overlay
+            cv2.rectangle(preview, (x, y), (x + w, y + h), (0, 255, 0), 3)
+            cv2.putText(preview, label, (x, y - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        self._update_camera_label_from_array(preview)
+    
     def capture_product_image(self, event=None):
         """Capture and save product image when button is clicked"""
         if not (self.capture_ready and self.detected_barcode):
@@ -1044,9 +1686,9 @@ class NutritionScannerApp:
         barcode = self.detected_barcode
         
         if getattr(self, 'camera', None) is not None:
-            ret, frame = self.camera.read()
-            if ret:
-                frame_to_save = frame.copy()
+            # The capture thread owns the camera - take its newest frame
+            with self.frame_lock:
+                frame_to_save = self.latest_frame
         
         if frame_to_save is None and self.captured_image is not None:
             frame_to_save = self.captured_image
@@ -1060,20 +1702,8 @@ class NutritionScannerApp:
         default_base = f"{barcode}_{timestamp}"
         safe_base = ''.join(c if (c.isalnum() or c in ('_', '-', ' ')) else '_' 
                            for c in default_base).strip().replace(' ', '_')
-        image_filename = f"{safe_base}.jpg"
-        image_path = os.path.join(PICTURES_DIR, image_filename)
-        
-        # Handle duplicates
-        counter = 1
-        while os.path.exists(image_path):
-            image_filename = f"{safe_base}_{counter}.jpg"
-            image_path = os.path.join(PICTURES_DIR, image_filename)
-            counter += 1
-            
-        cv2.imwrite(image_path, frame_to_save)
-        print(f"INFO: Saved image to {image_path}")
-
-        # Optional rename
+        
+        # Optional rename - asked before saving so the writer thread gets the final name
         new_base = simpledialog.askstring("Save Image", 
                                          "Enter file name (without extension):", 
                                          initialvalue=safe_base)
@@ -1081,21 +1711,13 @@ class NutritionScannerApp:
             new_base = new_base.strip()
             new_safe = ''.join(c if (c.isalnum() or c in ('_', '-', ' ')) else '_' 
                              for c in new_base).strip().replace(' ', '_')
-            new_filename = f"{new_safe}.jpg"
-            new_path = os.path.join(PICTURES_DIR, new_filename)
-            
-            c = 1
-            while os.path.exists(new_path):
-                new_filename = f"{new_safe}_{c}.jpg"
-                new_path = os.path.join(PICTURES_DIR, new_filename)
-                c += 1
-                
-            try:
-                os.replace(image_path, new_path)
-                image_path = new_path
-                print(f"INFO: Renamed image to {image_path}")
-            except Exception as e:
-                print(f"WARN: Could not rename image: {e}")
+            if new_safe:
+                safe_base = new_safe
+        
+        # Handle duplicates - including photos still queued for the writer
+        image_path = self._reserve_image_path(safe_base)
+        
+        self._save_q.put((image_path, frame_to_save))
 
         # Stop scanning and hide capture button
         self.scanning = False
@@ -1136,14 +1758,14 @@ class NutritionScannerApp:
         tk.Label(
             form_frame,
             text="Add New Product to Database",
-            font=("Arial", 18, "bold"),
+            font=ui_font(18, "bold"),
             bg="white"
         ).pack(pady=10)
         
         tk.Label(
             form_frame,
             text=f"Barcode: {barcode}",
-            font=("Arial", 12),
+            font=ui_font(12),
             bg="white",
             fg="#666"
         ).pack(pady=5)
@@ -1152,87 +1774,63 @@ class NutritionScannerApp:
             tk.Label(
                 form_frame,
                 text=f"Image: {os.path.basename(image_path)}",
-                font=("Arial", 10),
+                font=ui_font(10),
                 bg="white",
                 fg="#666"
             ).pack(pady=5)
         
-        # Form fields
+        # Form fields - one grid per section, built from PRODUCT_FORM_SECTIONS
         fields = {}
+        allergen_vars = {}
         
-        def create_field(label_text, field_name, default="", field_type="text"):
-            field_frame = tk.Frame(form_frame, bg="white")
-            field_frame.pack(fill=tk.X, pady=5, padx=20)
+        for section_title, section_fields in PRODUCT_FORM_SECTIONS:
+            tk.Label(form_frame, text=section_title, 
+                    font=ui_font(14, "bold"), bg="white").pack(pady=(20, 10))
             
-            tk.Label(
-                field_frame,
-                text=label_text,
-                font=("Arial", 11, "bold"),
-                bg="white",
-                anchor="w",
-                width=20
-            ).pack(side=tk.LEFT, padx=(0, 10))
+            if section_fields is None:
+                allergen_frame = tk.Frame(form_frame, bg="white")
+                allergen_frame.pack(pady=10)
+                
+                for i, (allergen, label) in enumerate(zip(ALLERGEN_LIST, ALLERGEN_LABELS)):
+                    var = tk.BooleanVar()
+                    allergen_vars[allergen] = var
+                    cb = tk.Checkbutton(
+                        allergen_frame,
+                        text=label,
+                        variable=var,
+                        font=ui_font(10),
+                        bg="white"
+                    )
+                    cb.grid(row=i//3, column=i%3, sticky='w', padx=10, pady=2)
+                continue
             
-            entry = tk.Entry(field_frame, font=("Arial", 11), width=30)
-            entry.insert(0, default)
-            entry.pack(side=tk.RIGHT)
-            fields[field_name] = entry
-        
-        # Basic Info
-        tk.Label(form_frame, text="Basic Information", 
-                font=("Arial", 14, "bold"), bg="white").pack(pady=(20, 10))
-        create_field("Product Name *", "name")
-        create_field("Brand", "brand")
-        create_field("Category", "category")
-        
-        # Nutrition Info
-        tk.Label(form_frame, text="Nutrition (per 100g)", 
-                font=("Arial", 14, "bold"), bg="white").pack(pady=(20, 10))
-        create_field("Calories (kcal)", "calories", "0", "number")
-        create_field("Protein (g)", "protein", "0.0", "number")
-        create_field("Carbs (g)", "carbs", "0.0", "number")
-        create_field("Sugar (g)", "sugar", "0.0", "number")
-        create_field("Fats (g)", "fats", "0.0", "number")
-        create_field("Saturated Fats (g)", "saturated_fats", "0.0", "number")
-        create_field("Fiber (g)", "fiber", "0.0", "number")
-        create_field("Sodium (g)", "sodium", "0.0", "number")
-        
-        # Allergens
-        tk.Label(form_frame, text="Allergens", 
-                font=("Arial", 14, "bold"), bg="white").pack(pady=(20, 10))
-        
-        allergen_list = ["dairy", "nuts", "peanuts", "gluten", "soy", 
-                        "eggs", "fish", "shellfish", "coconut", "sesame"]
-        allergen_vars = {}
-        
-        allergen_frame = tk.Frame(form_frame, bg="white")
-        allergen_frame.pack(pady=10)
-        
-        for i, allergen in enumerate(allergen_list):
-            var = tk.BooleanVar()
-            allergen_vars[allergen] = var
-            cb = tk.Checkbutton(
-                allergen_frame,
-                text=allergen.capitalize(),
-                variable=var,
-                font=("Arial", 10),
-                bg="white"
-            )
-            cb.grid(row=i//3, column=i%3, sticky='w', padx=10, pady=2)
-        
-        # Health Score
-        tk.Label(
-            form_frame,
-            text="Health Information", 
-            font=("Arial", 14, "bold"), bg="white"
-        ).pack(pady=(20, 10))
-        create_field("Health Score (0-100)", "health_score", "50", "number")
+            section_frame = tk.Frame(form_frame, bg="white")
+            section_frame.pack(fill=tk.X, padx=20)
+            section_frame.grid_columnconfigure(1, weight=1)
+            
+            for row, (label_text, field_name, default, _) in enumerate(section_fields):
+                tk.Label(
+                    section_frame,
+                    text=label_text,
+                    font=ui_font(11, "bold"),
+                    bg="white",
+                    anchor="w",
+                    width=20
+                ).grid(row=row, column=0, sticky="w", padx=(0, 10), pady=5)
+                
+                entry = tk.Entry(section_frame, font=ui_font(11), width=30)
+                entry.insert(0, default)
+                entry.grid(row=row, column=1, sticky="e", pady=5)
+                fields[field_name] = entry
         
         def save_product():
             """Save product to database via API or local cache"""
             try:
+                # Read every entry once
+                values = {name: entry.get().strip() for name, entry in fields.items()}
+                
                 # Validate required fields
-                if not fields["name"].get().strip():
+                if not values["name"]:
                     try:
                         messagebox.showerror("Error", "Product name is required!", parent=form_window)
                     finally:
@@ -1251,26 +1849,15 @@ class NutritionScannerApp:
                 selected_allergens_list = [allergen for allergen, var in allergen_vars.items() if var.get()]
                 selected_allergens = ",".join(selected_allergens_list)
                 
-                # Build product data
+                # Build product data - blank fields fall back to the form defaults
                 try:
-                    health_score_val = int(fields["health_score"].get() or 50)
-                    product_data = {
-                        "barcode": barcode,
-                        "name": fields["name"].get().strip(),
-                        "brand": fields["brand"].get().strip() or "",
-                        "category": fields["category"].get().strip() or "",
-                        "calories": float(fields["calories"].get() or 0),
-                        "protein": float(fields["protein"].get() or 0),
-                        "carbs": float(fields["carbs"].get() or 0),
-                        "sugar": float(fields["sugar"].get() or 0),
-                        "fats": float(fields["fats"].get() or 0),
-                        "saturated_fats": float(fields["saturated_fats"].get() or 0),
-                        "fiber": float(fields["fiber"].get() or 0),
-                        "sodium": float(fields["sodium"].get() or 0),
-                        "allergens": selected_allergens,
-                        "health_score": health_score_val,
-                        "is_healthy": 1 if health_score_val >= 60 else 0
-                    }
+                    product_data = {"barcode": barcode}
+                    for _, section_fields in PRODUCT_FORM_SECTIONS:
+                        for _, field_name, default, field_type in section_fields or ():
+                            product_data[field_name] = field_type(values[field_name] or default)
+                    product_data["allergens"] = selected_allergens
+                    product_data["allergen_mask"] = allergen_mask(selected_allergens_list)
+                    product_data["is_healthy"] = 1 if product_data["health_score"] >= 60 else 0
                 except ValueError:
                     try:
                         messagebox.showerror("Error", "Please enter valid numbers for nutrition values", parent=form_window)
@@ -1283,31 +1870,15 @@ class NutritionScannerApp:
                 
                 # Save directly to SQLite (no API calls)
                 try:
-                    conn = sqlite3.connect(SQLITE_DB)
-                    cursor = conn.cursor()
-                    
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO products
-                        (barcode, name, brand, category, calories, protein, carbs, sugar, fats,
-                         saturated_fats, fiber, sodium, allergens, health_score, is_healthy, cached_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    ''', (
-                        product_data["barcode"], product_data["name"], product_data["brand"], product_data["category"],
-                        product_data["calories"], product_data["protein"], product_data["carbs"], product_data["sugar"],
-                        product_data["fats"], product_data["saturated_fats"], product_data["fiber"], product_data["sodium"],
-                        product_data["allergens"], product_data["health_score"], product_data["is_healthy"]
-                    ))
-                    
                     # Add to scan_history for stats consistency
-                    product_allergens_set = set(selected_allergens_list)
-                    has_allergen = 1 if bool(self.user_allergens & product_allergens_set) else 0
-                    cursor.execute(
-                        'INSERT INTO scan_history (barcode, is_healthy, has_allergen) VALUES (?, ?, ?)',
-                        (product_data["barcode"], product_data["is_healthy"], has_allergen)
-                    )
+                    has_allergen = 1 if self.user_allergen_mask & product_data["allergen_mask"] else 0
                     
-                    conn.commit()
-                    conn.close()
+                    with self._db_lock:
+                        self.conn.execute(PRODUCT_UPSERT_SQL, product_row(product_data))
+                        self._remember_product(dict(product_data, allergens=frozenset(selected_allergens_list)))
+                    self.known_barcodes.add(product_data["barcode"])
+                    self._record_scan(product_data["barcode"], product_data["name"],
+                                      product_data["is_healthy"], has_allergen)
                 except Exception as e:
                     try:
                         save_btn.config(state=tk.NORMAL, text="Save Product")
@@ -1328,9 +1899,6 @@ class NutritionScannerApp:
                     self.camera_label.config(image='', text="Camera Off", bg="black", fg="white")
                 
                 # Update statistics
-                self.total_scans = self.get_total_scans()
-                self.healthy_scans = self.get_healthy_scans()
-                self.allergen_warnings = self.get_allergen_warnings()
                 self.scan_counter_label.config(text=f"Total Scans: {self.total_scans}")
             except Exception as e:
                 try:
@@ -1349,7 +1917,7 @@ class NutritionScannerApp:
             command=save_product,
             bg="#4caf50",
             fg="white",
-            font=("Arial", 14, "bold"),
+            font=ui_font(14, "bold"),
             width=15,
             height=2,
             cursor="hand2"
@@ -1363,7 +1931,7 @@ class NutritionScannerApp:
                             self.camera_label.config(image='', text="Camera Off", bg="black", fg="white")],
             bg="#757575",
             fg="white",
-            font=("Arial", 14, "bold"),
+            font=ui_font(14, "bold"),
             width=15,
             height=2,
             cursor="hand2"
@@ -1388,6 +1956,7 @@ class NutritionScannerApp:
         print(f"INFO: Selected file: {file_path}")
         
         try:
+            _lazy_cv()
             image = cv2.imread(file_path)
             
             if image is None:
@@ -1397,19 +1966,15 @@ class NutritionScannerApp:
             
             print(f"SUCCESS: Image loaded: {image.shape}")
             
-            # Display image in camera label
-            display_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            display_pil = Image.fromarray(display_image)
-            display_pil = display_pil.resize((480, 360), Image.Resampling.LANCZOS if hasattr(Image, 'Resampling') else Image.LANCZOS)
-            display_tk = ImageTk.PhotoImage(display_pil)
-            
-            self.camera_label.config(image=display_tk, text="")
-            self.camera_label.image = display_tk
+            # Display image in camera label - area resampling keeps large photos sharp
+            self._update_camera_label_from_array(image, cv2.INTER_AREA)
             self.root.update()
             
             print("INFO: Decoding barcodes...")
             
-            barcodes = pyzbar.decode(image)
+            # ZBar only needs luminance; stick to retail EAN/UPC symbologies
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            barcodes = pyzbar.decode(gray, symbols=BARCODE_SYMBOLS)
             
             if barcodes:
                 barcode_data = barcodes[0].data.decode('utf-8')
@@ -1443,11 +2008,11 @@ class NutritionScannerApp:
         tk.Label(
             dialog,
             text="Enter Barcode to Retrieve Info:",
-            font=("Arial", 12),
+            font=ui_font(12),
             bg="white"
         ).pack(pady=10)
         
-        entry = tk.Entry(dialog, font=("Arial", 14), width=25)
+        entry = tk.Entry(dialog, font=ui_font(14), width=25)
         entry.pack(pady=10)
         entry.focus()
         
@@ -1465,7 +2030,7 @@ class NutritionScannerApp:
             command=submit,
             bg="#4caf50",
             fg="white",
-            font=("Arial", 12, "bold"),
+            font=ui_font(12, "bold"),
             width=15,
             height=2,
             cursor="hand2"
@@ -1485,95 +2050,80 @@ class NutritionScannerApp:
         tk.Label(
             history_window,
             text="Recent Scans",
-            font=("Arial", 16, "bold"),
+            font=ui_font(16, "bold"),
             bg="white"
         ).pack(pady=20)
         
-        # Scrollable history
-        canvas = tk.Canvas(history_window, bg="white")
-        scrollbar = ttk.Scrollbar(history_window, orient="vertical", command=canvas.yview)
-        history_frame = tk.Frame(canvas, bg="white")
-        
-        history_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=history_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True, padx=20, pady=20)
-        scrollbar.pack(side="right", fill="y")
-        
-        # Get history from database
-        conn = sqlite3.connect(SQLITE_DB)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT sh.barcode, p.name, sh.scanned_at, sh.is_healthy, sh.has_allergen
-            FROM scan_history sh
-            LEFT JOIN products p ON sh.barcode = p.barcode
-            ORDER BY sh.scanned_at DESC
-            LIMIT 50
-        ''')
-        history = cursor.fetchall()
-        conn.close()
-        
-        if not history:
-            tk.Label(
-                history_frame,
-                text="No scan history yet!",
-                font=("Arial", 12),
-                bg="white",
-                fg="#666"
-            ).pack(pady=50)
-        else:
-            for i, (barcode, name, scanned_at, is_healthy, has_allergen) in enumerate(history):
-                item_frame = tk.Frame(history_frame, bg="#f5f5f5", relief=tk.RAISED, bd=1)
-                item_frame.pack(fill=tk.X, padx=10, pady=5)
-                
-                # Determine indicator
-                indicator = "[HEALTHY]" if is_healthy else "[WARNING]"
-                indicator_color = "#4caf50" if is_healthy else "#ff9800"
-                if has_allergen:
-                    indicator = "[ALLERGEN]"
-                    indicator_color = "#f44336"
-                
-                indicator_label = tk.Label(
-                    item_frame,
-                    text=indicator,
-                    font=("Arial", 10, "bold"),
-                    bg="#f5f5f5",
-                    fg=indicator_color,
-                    width=12
-                )
-                indicator_label.pack(side=tk.LEFT, padx=5, pady=10)
-                
-                tk.Label(
-                    item_frame,
-                    text=f"{name or 'Unknown Product'} ({barcode})",
-                    font=("Arial", 11),
-                    bg="#f5f5f5",
-                    anchor="w"
-                ).pack(side=tk.LEFT, padx=10, pady=10, fill=tk.X, expand=True)
-                
-                tk.Label(
-                    item_frame,
-                    text=scanned_at,
-                    font=("Arial", 9),
-                    bg="#f5f5f5",
-                    fg="#666"
-                ).pack(side=tk.RIGHT, padx=10, pady=10)
-        
+        # Close button goes in first so the list can take the rest of the window
         tk.Button(
             history_window,
             text="Close",
             command=history_window.destroy,
             bg="#757575",
             fg="white",
-            font=("Arial", 11),
+            font=ui_font(11),
             width=20,
             cursor="hand2"
-        ).pack(pady=20)
+        ).pack(side=tk.BOTTOM, pady=20)
+        
+        # Scrollable history - one Treeview instead of a frame of labels per scan
+        list_frame = tk.Frame(history_window, bg="white")
+        list_frame.pack(fill="both", expand=True, padx=20, pady=(0, 10))
+        
+        tree = ttk.Treeview(list_frame, columns=("status", "product", "time"), show="headings", height=20)
+        tree.heading("status", text="Status")
+        tree.heading("product", text="Product")
+        tree.heading("time", text="Scanned")
+        tree.column("status", width=110, anchor="w", stretch=False)
+        tree.column("product", width=380, anchor="w")
+        tree.column("time", width=150, anchor="e", stretch=False)
+        tree.tag_configure("healthy", foreground="#4caf50")
+        tree.tag_configure("warning", foreground="#ff9800")
+        tree.tag_configure("allergen", foreground="#f44336")
+        
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        tree.insert("", "end", values=("", "Loading...", ""))
+        
+        # Read on the writer thread, after any queued scans have landed, so the
+        # window never waits on the database
+        def load_history():
+            with self._db_lock:
+                history = self.conn.execute('''
+                    SELECT barcode, name, scanned_at, is_healthy, has_allergen
+                    FROM scan_history
+                    ORDER BY scanned_at DESC
+                    LIMIT 50
+                ''').fetchall()
+            self.root.after(0, show_history, history)
+        
+        def show_history(history):
+            if not tree.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            self._fill_history(tree, history)
+        
+        self._write_q.put(load_history)
+    
+    def _fill_history(self, tree, history):
+        """Insert scan_history rows into the history tree"""
+        if not history:
+            tree.insert("", "end", values=("", "No scan history yet!", ""))
+        else:
+            for barcode, name, scanned_at, is_healthy, has_allergen in history:
+                # Determine indicator
+                if has_allergen:
+                    indicator, tag = "[ALLERGEN]", "allergen"
+                elif is_healthy:
+                    indicator, tag = "[HEALTHY]", "healthy"
+                else:
+                    indicator, tag = "[WARNING]", "warning"
+                
+                tree.insert("", "end", values=(indicator, f"{name or 'Unknown Product'} ({barcode})", scanned_at),
+                            tags=(tag,))
     
     def view_statistics(self):
         """View scanning statistics"""
@@ -1586,7 +2136,7 @@ class NutritionScannerApp:
         tk.Label(
             stats_window,
             text="Your Scanning Statistics",
-            font=("Arial", 16, "bold"),
+            font=ui_font(16, "bold"),
             bg="white"
         ).pack(pady=20)
         
@@ -1600,14 +2150,14 @@ class NutritionScannerApp:
         tk.Label(
             total_frame,
             text="Total Scans",
-            font=("Arial", 14, "bold"),
+            font=ui_font(14, "bold"),
             bg="#e3f2fd"
         ).pack(pady=10)
         
         tk.Label(
             total_frame,
             text=str(self.total_scans),
-            font=("Arial", 32, "bold"),
+            font=ui_font(32, "bold"),
             bg="#e3f2fd",
             fg="#2196f3"
         ).pack(pady=5)
@@ -1619,7 +2169,7 @@ class NutritionScannerApp:
         tk.Label(
             healthy_frame,
             text="Healthy Products",
-            font=("Arial", 14, "bold"),
+            font=ui_font(14, "bold"),
             bg="#e8f5e9"
         ).pack(pady=10)
         
@@ -1628,7 +2178,7 @@ class NutritionScannerApp:
         tk.Label(
             healthy_frame,
             text=f"{self.healthy_scans} ({healthy_percentage:.1f}%)",
-            font=("Arial", 28, "bold"),
+            font=ui_font(28, "bold"),
             bg="#e8f5e9",
             fg="#4caf50"
         ).pack(pady=5)
@@ -1640,14 +2190,14 @@ class NutritionScannerApp:
         tk.Label(
             allergen_frame,
             text="Allergen Warnings",
-            font=("Arial", 14, "bold"),
+            font=ui_font(14, "bold"),
             bg="#ffebee"
         ).pack(pady=10)
         
         tk.Label(
             allergen_frame,
             text=str(self.allergen_warnings),
-            font=("Arial", 32, "bold"),
+            font=ui_font(32, "bold"),
             bg="#ffebee",
             fg="#f44336"
         ).pack(pady=5)
@@ -1657,7 +2207,7 @@ class NutritionScannerApp:
             tk.Label(
                 stats_window,
                 text="Test LED Animations:",
-                font=("Arial", 12),
+                font=ui_font(12),
                 bg="white"
             ).pack(pady=(20, 10))
             
@@ -1670,7 +2220,7 @@ class NutritionScannerApp:
                 command=lambda: self.set_led_color(None, 'rainbow'),
                 bg="#9c27b0",
                 fg="white",
-                font=("Arial", 10),
+                font=ui_font(10),
                 width=10,
                 cursor="hand2"
             ).pack(side=tk.LEFT, padx=5)
@@ -1681,7 +2231,7 @@ class NutritionScannerApp:
                 command=lambda: self.set_led_color(GREEN, 'pulse'),
                 bg="#4caf50",
                 fg="white",
-                font=("Arial", 10),
+                font=ui_font(10),
                 width=10,
                 cursor="hand2"
             ).pack(side=tk.LEFT, padx=5)
@@ -1692,7 +2242,7 @@ class NutritionScannerApp:
                 command=lambda: self.set_led_color(RED, 'flash'),
                 bg="#f44336",
                 fg="white",
-                font=("Arial", 10),
+                font=ui_font(10),
                 width=10,
                 cursor="hand2"
             ).pack(side=tk.LEFT, padx=5)
@@ -1703,43 +2253,45 @@ class NutritionScannerApp:
             command=stats_window.destroy,
             bg="#757575",
             fg="white",
-            font=("Arial", 11),
+            font=ui_font(11),
             width=20,
             cursor="hand2"
         ).pack(pady=20)
     
     def process_barcode(self, barcode):
         """Process barcode - removes leading 0 for UPC-A codes and retrieves product"""
+        barcode = normalize_barcode(barcode)
+        if not barcode:
+            self.display_error("Invalid barcode - it must contain digits")
+            return
+        
         # Convert EAN-13 to UPC-A if needed
-        if len(barcode) == 13 and barcode.startswith('0'):
+        if len(barcode) == 13 and barcode[0] == '0':
             barcode = barcode[1:]
         
         print(f"INFO: Processing barcode: {barcode}")
         
-        # Clear results frame
-        for widget in self.results_frame.winfo_children():
-            widget.destroy()
-        
-        # Show loading message
-        loading = tk.Label(
-            self.results_frame,
-            text="Loading product information...",
-            font=("Arial", 16),
-            bg="white"
-        )
-        loading.pack(pady=50)
-        self.root.update()
-        
-        # Get product data
-        product = self.get_product_data(barcode)
+        # Clear results frame and show loading message
+        self._clear_results()
+        self._loading_label.pack(pady=50)
+        
+        # Network lookup runs on a worker thread; only the newest lookup is shown
+        self._lookup_seq += 1
+        seq = self._lookup_seq
+        threading.Thread(
+            target=lambda: self.root.after(0, self._show_lookup_result, seq, barcode, self.get_product_data(barcode)),
+            daemon=True
+        ).start()
+    
+    def _show_lookup_result(self, seq, barcode, product):
+        """Display a finished product lookup on the GUI thread"""
+        if seq != self._lookup_seq:
+            return
         
         if product:
             self.display_product_info(product)
             
             # Update statistics
-            self.total_scans = self.get_total_scans()
-            self.healthy_scans = self.get_healthy_scans()
-            self.allergen_warnings = self.get_allergen_warnings()
             self.scan_counter_label.config(text=f"Total Scans: {self.total_scans}")
         else:
             self.display_error(f"Product not found: {barcode}")
@@ -1752,10 +2304,11 @@ class NutritionScannerApp:
         
         if self.is_online:
             try:
-                print(f"INFO: API call: {API_BASE_URL}/get_product.php?barcode={barcode}")
-                response = requests.get(
-                    f"{API_BASE_URL}/get_product.php?barcode={barcode}",
-                    timeout=5
+                print(f"INFO: API call: {PRODUCT_URL}?barcode={barcode}")
+                response = http_session.get(
+                    PRODUCT_URL,
+                    params={"barcode": barcode},
+                    timeout=(API_CONNECT_TIMEOUT, 5)
                 )
                 
                 print(f"INFO: Response: {response.status_code}")
@@ -1764,6 +2317,8 @@ class NutritionScannerApp:
                     data = response.json()
                     if data.get('success'):
                         product = data.get('data')
+                        # Products leave the lookup with allergens as a frozenset, whatever the source
+                        product['allergens'] = parse_allergens(product.get('allergens'))
                         self.cache_product(product)
                         print(f"SUCCESS: Fetched from database: {product['name']}")
                     else:
@@ -1783,76 +2338,61 @@ class NutritionScannerApp:
     
     def cache_product(self, product):
         """Cache product in local database"""
-        conn = sqlite3.connect(SQLITE_DB)
-        cursor = conn.cursor()
-        
-        # Handle allergens - convert list to string for storage
-        allergens_str = ','.join(product.get('allergens', [])) if isinstance(product.get('allergens'), list) else product.get('allergens', '')
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO products 
-            (barcode, name, brand, category, calories, protein, carbs, sugar, fats, 
-            saturated_fats, fiber, sodium, allergens, health_score, is_healthy, cached_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        ''', (
-            product['barcode'], product['name'], product.get('brand'), product.get('category'),
-            product.get('calories'), product.get('protein'), product.get('carbs'), 
-            product.get('sugar'), product.get('fats'), product.get('saturated_fats'),
-            product.get('fiber'), product.get('sodium'), allergens_str,
-            product.get('health_score'), product.get('is_healthy')
-        ))
+        row = product_row(product)
         
         # Check if product has user's allergens
-        product_allergens = set(product.get('allergens', []))
-        if isinstance(product.get('allergens'), str):
-            product_allergens = set(product['allergens'].split(',')) if product['allergens'] else set()
-        has_allergen = 1 if bool(self.user_allergens & product_allergens) else 0
+        product_mask = product['allergen_mask'] = row[-1]
+        has_allergen = 1 if self.user_allergen_mask & product_mask else 0
+        
+        # Written by the background writer - the lookup doesn't wait for the commit
+        self._write_q.put((PRODUCT_UPSERT_SQL, row))
+        # The queued write may not have landed yet - serve repeat lookups from memory
+        with self._db_lock:
+            self._remember_product(product)
+        self.known_barcodes.add(product['barcode'])
         
         # Add to scan history
-        cursor.execute(
-            'INSERT INTO scan_history (barcode, is_healthy, has_allergen) VALUES (?, ?, ?)', 
-            (product['barcode'], product.get('is_healthy', 0), has_allergen)
-        )
-        conn.commit()
-        conn.close()
+        self._record_scan(product['barcode'], product['name'], product.get('is_healthy', 0), has_allergen)
     
     def get_cached_product(self, barcode):
         """Get product from local cache"""
-        conn = sqlite3.connect(SQLITE_DB)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM products WHERE barcode = ?', (barcode,))
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            columns = ['id', 'barcode', 'name', 'brand', 'category', 'calories', 'protein', 'carbs', 
-                      'sugar', 'fats', 'saturated_fats', 'fiber', 'sodium', 'allergens', 
-                      'health_score', 'is_healthy', 'cached_at']
-            product = dict(zip(columns, row))
+        # Unknown barcodes can't be in the cache - skip the database entirely
+        if barcode not in self.known_barcodes:
+            return None
+        
+        with self._db_lock:
+            product = self._product_memo.get(barcode)
+            if product is not None:
+                self._product_memo.move_to_end(barcode)
+                return product
             
-            # Convert allergens string back to list
-            if product['allergens']:
-                product['allergens'] = product['allergens'].split(',')
-            else:
-                product['allergens'] = []
+            cursor = self.conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            row = cursor.execute(PRODUCT_SELECT_SQL, (barcode,)).fetchone()
+            if row is None:
+                return None
             
-            return product
-        
-        return None
+            product = dict(row)
+            product['allergens'] = parse_allergens(product['allergens'])
+            self._remember_product(product)
+        return product
+    
+    def _remember_product(self, product):
+        """Store a product in the in-memory lookup cache - caller holds _db_lock"""
+        memo = self._product_memo
+        memo[product['barcode']] = product
+        memo.move_to_end(product['barcode'])
+        if len(memo) > PRODUCT_MEMO_SIZE:
+            memo.popitem(last=False)
     
     def display_product_info(self, product):
         """Display product information in results panel"""
         # Clear results frame
-        for widget in self.results_frame.winfo_children():
-            widget.destroy()
-        
-        # Check for allergens
-        product_allergens = set(product.get('allergens', []))
-        if isinstance(product.get('allergens'), str):
-            product_allergens = set(product['allergens'].split(',')) if product['allergens'] else set()
+        self._clear_results()
         
-        has_allergen = bool(self.user_allergens & product_allergens)
+        # Check for allergens - lookups hand over a frozenset plus its bitmask
+        product_allergens = product['allergens']
+        has_allergen = bool(self.user_allergen_mask & product['allergen_mask'])
         
         # Set LED color based on product status
         if SENSEHAT_AVAILABLE:
@@ -1864,186 +2404,69 @@ class NutritionScannerApp:
                 self.set_led_color(ORANGE, 'solid')
         
         # Product name
-        name_label = tk.Label(
-            self.results_frame,
-            text=product['name'],
-            font=("Arial", 18, "bold"),
-            bg="white",
-            wraplength=350
-        )
-        name_label.pack(pady=10)
+        self._name_label.config(text=product['name'])
+        self._name_label.pack(pady=10)
         
         # Brand
         if product.get('brand'):
-            brand_label = tk.Label(
-                self.results_frame,
-                text=product['brand'],
-                font=("Arial", 12),
-                bg="white",
-                fg="#666"
-            )
-            brand_label.pack()
+            self._brand_label.config(text=product['brand'])
+            self._brand_label.pack()
         
         # Allergen warning (if applicable)
         if has_allergen:
-            allergen_frame = tk.LabelFrame(
-                self.results_frame,
-                text="⚠️ ALLERGEN ALERT",
-                font=("Arial", 14, "bold"),
-                bg="#ffebee",
-                fg="#f44336",
-                relief=tk.RAISED,
-                bd=3
-            )
-            allergen_frame.pack(pady=15, padx=20, fill=tk.X)
-            
             matching_allergens = self.user_allergens & product_allergens
             allergens_text = ", ".join([a.upper() for a in matching_allergens])
-            
-            tk.Label(
-                allergen_frame,
-                text=f"WARNING: Contains {allergens_text}",
-                font=("Arial", 12, "bold"),
-                bg="#ffebee",
-                fg="#f44336",
-                wraplength=350
-            ).pack(padx=10, pady=10)
+            self._alert_label.config(text=f"WARNING: Contains {allergens_text}")
+            self._alert_frame.pack(pady=15, padx=20, fill=tk.X)
         
         # Health Score
         health_score = product.get('health_score', 50)
-        score_color = "#4caf50" if health_score >= 70 else "#ff9800" if health_score >= 40 else "#f44336"
+        score_color = SCORE_COLORS[max(0, min(int(health_score), 100)) // 10]
         
-        score_frame = tk.Frame(self.results_frame, bg=score_color, relief=tk.RAISED, bd=2)
-        score_frame.pack(pady=10, padx=20, fill=tk.X)
-        
-        tk.Label(
-            score_frame,
-            text=f"Health Score: {health_score}/100",
-            font=("Arial", 14, "bold"),
-            bg=score_color,
-            fg="white"
-        ).pack(pady=10)
+        self._score_frame.config(bg=score_color)
+        self._score_label.config(text=f"Health Score: {health_score}/100", bg=score_color)
+        self._score_frame.pack(pady=10, padx=20, fill=tk.X)
         
         # Health status
         if product.get('is_healthy'):
-            health_text = "✓ Healthy Choice"
-            health_color = "#4caf50"
+            self._health_label.config(text="✓ Healthy Choice", fg="#4caf50")
         else:
-            health_text = "⚠️ Consider Healthier Options"
-            health_color = "#ff9800"
-        
-        tk.Label(
-            self.results_frame,
-            text=health_text,
-            font=("Arial", 12, "bold"),
-            bg="white",
-            fg=health_color
-        ).pack(pady=5)
-        
-        # Nutrition facts
-        nutrition_frame = tk.LabelFrame(
-            self.results_frame,
-            text="Nutrition Facts (per 100g)",
-            font=("Arial", 12, "bold"),
-            bg="white"
-        )
-        nutrition_frame.pack(pady=10, padx=20, fill=tk.X)
-        
-        nutrition_data = [
-            ("Calories", product.get('calories'), "kcal"),
-            ("Protein", product.get('protein'), "g"),
-            ("Carbohydrates", product.get('carbs'), "g"),
-            ("Sugar", product.get('sugar'), "g"),
-            ("Total Fat", product.get('fats'), "g"),
-            ("Saturated Fat", product.get('saturated_fats'), "g"),
-            ("Fiber", product.get('fiber'), "g"),
-            ("Sodium", product.get('sodium'), "g"),
-        ]
-        
-        for label, value, unit in nutrition_data:
+            self._health_label.config(text="⚠️ Consider Healthier Options", fg="#ff9800")
+        self._health_label.pack(pady=5)
+        
+        # Nutrition facts - rows without a value stay hidden
+        self._nutrition_frame.pack(pady=10, padx=20, fill=tk.X)
+        nutrition_rows = self._nutrition_rows
+        for _, key, unit in NUTRITION_FIELDS:
+            row, value_label = nutrition_rows[key]
+            row.pack_forget()
+            value = product.get(key)
             if value is not None:
-                row = tk.Frame(nutrition_frame, bg="white")
+                value_label.config(text=f"{value} {unit}")
                 row.pack(fill=tk.X, padx=10, pady=2)
-                
-                tk.Label(
-                    row,
-                    text=label,
-                    font=("Arial", 11),
-                    bg="white",
-                    anchor="w"
-                ).pack(side=tk.LEFT)
-                
-                tk.Label(
-                    row,
-                    text=f"{value} {unit}",
-                    font=("Arial", 11, "bold"),
-                    bg="white",
-                    anchor="e"
-                ).pack(side=tk.RIGHT)
         
         # All allergens in product
-        if product_allergens and len(product_allergens) > 0:
-            allergen_frame2 = tk.LabelFrame(
-                self.results_frame,
-                text="Contains Allergens",
-                font=("Arial", 11, "bold"),
-                bg="white"
-            )
-            allergen_frame2.pack(pady=10, padx=20, fill=tk.X)
-            
-            allergens_text = ", ".join([a.capitalize() for a in product_allergens])
-            tk.Label(
-                allergen_frame2,
-                text=allergens_text,
-                font=("Arial", 10),
-                bg="white",
-                fg="#666",
-                wraplength=350
-            ).pack(padx=10, pady=5)
+        if product_allergens:
+            # Joined once per product and kept on it - repeat scans come from the in-memory cache
+            contains_text = product.get('_contains_text')
+            if contains_text is None:
+                contains_text = product['_contains_text'] = ", ".join([a.capitalize() for a in product_allergens])
+            self._contains_label.config(text=contains_text)
+            self._contains_frame.pack(pady=10, padx=20, fill=tk.X)
         
         # Category
         if product.get('category'):
-            tk.Label(
-                self.results_frame,
-                text=f"Category: {product['category']}",
-                font=("Arial", 10),
-                bg="white",
-                fg="#666"
-            ).pack(pady=5)
+            self._category_label.config(text=f"Category: {product['category']}")
+            self._category_label.pack(pady=5)
     
     def display_error(self, message):
         """Display error message in results panel"""
-        for widget in self.results_frame.winfo_children():
-            widget.destroy()
-        
-        error_label = tk.Label(
-            self.results_frame,
-            text="Product Not Found",
-            font=("Arial", 18, "bold"),
-            bg="white",
-            fg="#f44336"
-        )
-        error_label.pack(pady=20)
+        self._clear_results()
         
-        message_label = tk.Label(
-            self.results_frame,
-            text=message,
-            font=("Arial", 12),
-            bg="white",
-            wraplength=350
-        )
-        message_label.pack(pady=10)
-        
-        # Suggestions
-        suggestions = tk.Label(
-            self.results_frame,
-            text="Try:\n• Adding the product using 'Add Product' button\n• Checking the barcode number\n• Using Manual Entry",
-            font=("Arial", 11),
-            bg="white",
-            fg="#666",
-            justify=tk.LEFT
-        )
-        suggestions.pack(pady=20)
+        self._error_title.pack(pady=20)
+        self._error_message.config(text=message)
+        self._error_message.pack(pady=10)
+        self._error_hint.pack(pady=20)
 
 
 def main():
@@ -2054,6 +2477,8 @@ def main():
     try:
         root.mainloop()
     finally:
+        # Closing the window skips quit_app - make sure queued writes still land
+        app.shutdown()
         if SENSEHAT_AVAILABLE:
             sense.clear()
         print("INFO: Application closed")